@@ -0,0 +1 @@
+"""Benchmark tahap-tahap clustering UMKM atas data sintetis."""
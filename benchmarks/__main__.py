@@ -0,0 +1,172 @@
+"""Ukur waktu dan memori puncak tiap tahap clustering atas data UMKM sintetis.
+
+Contoh:
+    python -m benchmarks --sizes 1000 10000 100000 --output benchmarks/baseline.json
+    python -m benchmarks --sizes 1000 10000 --compare benchmarks/baseline.json
+"""
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import sklearn
+from sklearn.preprocessing import StandardScaler
+
+from benchmarks.data import generate_umkm
+from clustering.config import ROCK_SAMPLE_SIZE
+from clustering.embedding import embed_2d
+from clustering.engine import calculate_links, compute_cp_star, encode_categorical, factorize_columns, neighbor_graph
+from clustering.pipeline import evaluate_ensemble, run_categorical, run_ensemble, run_numeric, sampling_agreement
+from clustering.preprocessing import CAT_COLS, NUM_COLS, preprocess
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+# Tahap O(n²) atau lebih dilewati di atas jumlah baris ini. Dengan dua kolom kategori
+# hampir semua pasangan bertetangga, sehingga calculate_links mendekati perkalian matriks padat.
+LINKS_MAX_ROWS = 2_000
+TSNE_MAX_ROWS = 5_000
+LINKS_THETA = 0.5
+# Selisih di bawah ini dianggap noise saat membandingkan dengan baseline
+MIN_SECONDS = 0.05
+MIN_PEAK_MB = 1.0
+
+
+def measure(func, memory=True):
+    """Jalankan ``func`` sekali untuk waktu dan, bila ``memory``, sekali lagi di bawah
+    tracemalloc (agar overhead tracing tidak ikut terhitung dalam waktu)."""
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        func()
+        peak_mb = tracemalloc.get_traced_memory()[1] / 1024 ** 2
+        tracemalloc.stop()
+    return result, seconds, peak_mb
+
+
+def benchmark_size(n_rows, seed=0, memory=True, links_max_rows=LINKS_MAX_ROWS, tsne_max_rows=TSNE_MAX_ROWS,
+                   n_jobs=1):
+    """Jalankan semua tahap berurutan atas ``n_rows`` baris sintetis."""
+    df = generate_umkm(n_rows, seed)
+    records = []
+
+    def stage(name, func, skip=False, annotate=None):
+        record = {'rows': n_rows, 'stage': name, 'seconds': None, 'peak_mb': None, 'skipped': skip}
+        result = None
+        if not skip:
+            result, record['seconds'], record['peak_mb'] = measure(func, memory)
+            if annotate is not None:
+                record.update(annotate(result))
+        records.append(record)
+        report([record])
+        return result
+
+    df_clean, df_zscore = stage('preprocessing', lambda: preprocess(df, NUM_COLS))
+
+    numeric = stage('ahc', lambda: run_numeric(df_zscore, n_jobs))
+    df_clean['cluster_numerik'] = numeric['labels']
+
+    codes = factorize_columns(encode_categorical(df_clean[CAT_COLS]))
+    stage('calculate_links', lambda: calculate_links(neighbor_graph(codes, LINKS_THETA)),
+          skip=n_rows > links_max_rows)
+
+    # Jalur baris penuh O(n²) tidak muat untuk ukuran besar; tahap ROCK mengukur mode terkompresi
+    categorical = stage('rock_grid', lambda: run_categorical(df_clean, compress=True, n_jobs=n_jobs))
+    df_clean['cluster_kategorik'] = categorical['labels']
+    # Mode sampel dibandingkan dengan grid penuh di atas: ARI 1 berarti label identik
+    stage('rock_sampel', lambda: run_categorical(df_clean, compress=True, n_jobs=n_jobs, sample_size=ROCK_SAMPLE_SIZE),
+          skip=n_rows <= ROCK_SAMPLE_SIZE,
+          annotate=lambda sampled: {'ari_vs_penuh': sampling_agreement(sampled, categorical)['ari']})
+    stage('rock_goodness', lambda: run_categorical(df_clean, compress=True, n_jobs=n_jobs, method='goodness'))
+    stage('compute_cp_star', lambda: compute_cp_star(categorical['encoded'], categorical['labels']))
+
+    ensemble = stage('ensemble', lambda: run_ensemble(df_clean, compress=True, n_jobs=n_jobs))
+    df_clean['cluster_ensemble_rock'] = ensemble['labels']
+    stage('evaluasi_dbi', lambda: evaluate_ensemble(df_clean))
+
+    X_scaled = StandardScaler().fit_transform(df_zscore[NUM_COLS])
+    stage('tsne_sampel', lambda: embed_2d(X_scaled, 'sampel', labels=numeric['labels']))
+    stage('tsne_penuh', lambda: embed_2d(X_scaled, 'tsne'), skip=n_rows > tsne_max_rows)
+    return records
+
+
+def environment():
+    return {
+        'waktu': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'platform': platform.platform(),
+        'numpy': np.__version__, 'pandas': pd.__version__, 'scikit-learn': sklearn.__version__,
+    }
+
+
+def compare(records, baseline, tolerance):
+    """Tahap yang waktu atau memori puncaknya naik lebih dari ``tolerance`` dari baseline."""
+    base = {(r['rows'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for record in records:
+        previous = base.get((record['rows'], record['stage']))
+        if previous is None or record['skipped'] or previous['skipped']:
+            continue
+        for metric, floor in (('seconds', MIN_SECONDS), ('peak_mb', MIN_PEAK_MB)):
+            new, old = record[metric], previous[metric]
+            if new is None or old is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > floor:
+                regressions.append({'rows': record['rows'], 'stage': record['stage'], 'metric': metric,
+                                    'baseline': old, 'sekarang': new})
+    return regressions
+
+
+def report(records):
+    for r in records:
+        if r['skipped']:
+            print(f"{r['rows']:>9,}  {r['stage']:<16} dilewati")
+            continue
+        peak = f"{r['peak_mb']:10.1f} MB" if r['peak_mb'] is not None else ''
+        ari = f"  ARI {r['ari_vs_penuh']:.4f}" if 'ari_vs_penuh' in r else ''
+        print(f"{r['rows']:>9,}  {r['stage']:<16} {r['seconds']:9.3f} s{peak}{ari}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Benchmark tahap clustering UMKM.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="jumlah baris sintetis")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--n-jobs", type=int, default=1, help="jumlah worker grid search")
+    parser.add_argument("--links-max-rows", type=int, default=LINKS_MAX_ROWS,
+                        help="lewati calculate_links di atas jumlah baris ini")
+    parser.add_argument("--tsne-max-rows", type=int, default=TSNE_MAX_ROWS,
+                        help="lewati t-SNE penuh di atas jumlah baris ini")
+    parser.add_argument("--no-memory", action="store_true", help="ukur waktu saja, tanpa tracemalloc")
+    parser.add_argument("--output", help="tulis hasil ke file JSON (mis. benchmarks/baseline.json)")
+    parser.add_argument("--compare", help="baseline JSON untuk deteksi regresi")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="kenaikan relatif yang masih diterima")
+    args = parser.parse_args(argv)
+
+    records = []
+    for n_rows in args.sizes:
+        records += benchmark_size(
+            n_rows, args.seed, not args.no_memory, args.links_max_rows, args.tsne_max_rows, args.n_jobs
+        )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'lingkungan': environment(), 'results': records}, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(records, json.load(f), args.tolerance)
+        for r in regressions:
+            print(f"REGRESI {r['rows']:,} baris, {r['stage']} {r['metric']}: {r['baseline']:.3f} -> {r['sekarang']:.3f}")
+        if regressions:
+            sys.exit(1)
+        print("Tidak ada regresi terhadap baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+"""Generator data UMKM sintetis dengan kolom seperti data asli."""
+
+import numpy as np
+import pandas as pd
+
+
+def generate_umkm(n_rows, seed=0, messy=True, outlier_rate=0.005):
+    """Data UMKM sintetis: ``modal``, ``omset``, ``tenaga kerja``, ``ojol``, ``jenis``.
+
+    Modal berdistribusi lognormal, omset berkorelasi dengan modal, jumlah tenaga
+    kerja naik dengan omset, dan usaha makanan-minuman lebih sering memakai ojol.
+    Sebagian kecil baris diberi nilai ekstrem agar tahap clip IQR ikut bekerja,
+    dan bila ``messy`` sebagian kategori ditulis dengan kapital/spasi berbeda.
+    """
+    rng = np.random.default_rng(seed)
+    jenis = np.where(rng.random(n_rows) < 0.7, 'mamin', 'oleh')
+    ojol = np.where(rng.random(n_rows) < np.where(jenis == 'mamin', 0.6, 0.25), 'ya', 'tidak')
+
+    modal = rng.lognormal(mean=16.0, sigma=1.1, size=n_rows)
+    omset = modal * rng.lognormal(mean=-0.3, sigma=0.6, size=n_rows)
+    outlier = rng.random(n_rows) < outlier_rate
+    modal[outlier] *= rng.uniform(10, 50, outlier.sum())
+    omset[outlier] *= rng.uniform(10, 50, outlier.sum())
+    tenaga_kerja = 1 + rng.poisson(np.clip(np.log10(omset) - 6, 0.2, None))
+
+    df = pd.DataFrame({
+        'modal': np.round(modal, -3).astype(np.int64),
+        'omset': np.round(omset, -3).astype(np.int64),
+        'tenaga kerja': tenaga_kerja.astype(np.int64),
+        'ojol': ojol.astype(object),
+        'jenis': jenis.astype(object),
+    })
+    if messy:
+        for col in ('ojol', 'jenis'):
+            variant = rng.random(n_rows) < 0.1
+            df.loc[variant, col] = ' ' + df.loc[variant, col].str.capitalize() + ' '
+    return df
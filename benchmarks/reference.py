@@ -0,0 +1,130 @@
+"""Cek regresi grid ROCK terhadap implementasi awal aplikasi (acuan).
+
+Acuan adalah kode ROCK versi awal ``streamlit_app.py``: link padat dari
+himpunan tetangga, average linkage ``scipy`` atas 1 / (link + 1e-5),
+``fcluster(maxclust)``, dan CP* dari semua pasangan anggota klaster. Data
+uji sengaja penuh tinggi kembar (dua kolom kategori, label ensemble acak).
+Grid default (baris penuh) harus memilih (theta, k, label) yang sama dan
+menghasilkan CP* yang sama untuk setiap kandidat; mode terkompresi hanya
+dilaporkan karena merupakan aproksimasi.
+
+Contoh:
+    python -m benchmarks.reference --rows 150 --seeds 10
+"""
+
+import argparse
+import sys
+from itertools import combinations
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.spatial.distance import squareform
+from sklearn.metrics import adjusted_rand_score, pairwise_distances
+from sklearn.preprocessing import LabelEncoder, OneHotEncoder
+
+from benchmarks.data import generate_umkm
+from clustering.config import CATEGORICAL_THETAS, ENSEMBLE_COLS, ENSEMBLE_THETAS, ROCK_K_RANGE
+from clustering.pipeline import run_categorical, run_ensemble
+from clustering.preprocessing import CAT_COLS, NUM_COLS, preprocess
+
+CP_TOLERANCE = 1e-9
+
+
+def reference_rock_clustering(df_cat, theta, k_opt):
+    encoded = pd.DataFrame()
+    for col in df_cat.columns:
+        encoded[col] = LabelEncoder().fit_transform(df_cat[col])
+    sim_matrix = 1 - pairwise_distances(encoded, metric="hamming")
+    n = len(sim_matrix)
+    neighbors = [set(np.where(sim_matrix[i] >= theta)[0]) - {i} for i in range(n)]
+    links = np.zeros((n, n), dtype=int)
+    for i, j in combinations(range(n), 2):
+        links[i, j] = links[j, i] = len(neighbors[i] & neighbors[j])
+    dist = 1 / (links + 1e-5)
+    np.fill_diagonal(dist, 0)
+    linkage_matrix = linkage(squareform(dist, checks=False), method='average')
+    return fcluster(linkage_matrix, t=k_opt, criterion='maxclust'), encoded
+
+
+def reference_cp_star(encoded, labels):
+    sim_matrix = 1 - pairwise_distances(encoded, metric="hamming")
+    cp_total = 0
+    for lbl in np.unique(labels):
+        indices = np.where(labels == lbl)[0]
+        n_k = len(indices)
+        if n_k <= 1:
+            continue
+        sim_sum = sum(sim_matrix[i, j] for i, j in combinations(indices, 2))
+        cp_total += n_k * sim_sum / (n_k * (n_k - 1) / 2)
+    return cp_total / len(labels)
+
+
+def reference_grid(df_cat, theta_list, k_range, cp_encoded=None):
+    best = {'theta': None, 'k': None, 'CP': -np.inf, 'labels': None}
+    results = []
+    for theta in theta_list:
+        for k_opt in k_range:
+            labels, encoded = reference_rock_clustering(df_cat, theta, k_opt)
+            cp_star = reference_cp_star(encoded if cp_encoded is None else cp_encoded, labels)
+            results.append((theta, k_opt, cp_star))
+            if cp_star > best['CP']:
+                best = {'theta': theta, 'k': k_opt, 'CP': cp_star, 'labels': labels}
+    best['results'] = results
+    return best
+
+
+def compare(name, seed, reference, full, compressed):
+    """Baris laporan; ``ok`` False bila grid baris penuh menyimpang dari acuan."""
+    cp_diff = max(abs(a[2] - b[2]) for a, b in zip(reference['results'], full['results']))
+    ok = ((full['theta'], full['k']) == (reference['theta'], reference['k'])
+          and np.array_equal(full['labels'], reference['labels']) and cp_diff <= CP_TOLERANCE)
+    return {
+        'data': name, 'seed': seed, 'ok': ok, 'acuan': (reference['theta'], reference['k'], reference['CP']),
+        'penuh': (full['theta'], full['k'], full['CP']), 'selisih_cp_maks': cp_diff,
+        'terkompresi': (compressed['theta'], compressed['k'], compressed['CP']),
+        'ari_terkompresi': adjusted_rand_score(reference['labels'], compressed['labels']),
+    }
+
+
+def check_seed(n_rows, seed):
+    df_clean, _ = preprocess(generate_umkm(n_rows, seed), NUM_COLS)
+    rows = []
+
+    reference = reference_grid(df_clean[CAT_COLS], CATEGORICAL_THETAS, ROCK_K_RANGE)
+    rows.append(compare('kategorik', seed, reference, run_categorical(df_clean), run_categorical(df_clean, True)))
+
+    # Label klaster acak: banyak baris identik dan jarak kembar
+    rng = np.random.default_rng(seed)
+    df_clean['cluster_numerik'] = rng.integers(1, 6, n_rows)
+    df_clean['cluster_kategorik'] = rng.integers(1, 4, n_rows)
+    df_ensemble_input = df_clean[ENSEMBLE_COLS].astype(str)
+    encoded_ensemble = OneHotEncoder(sparse_output=False).fit_transform(df_ensemble_input)
+    reference = reference_grid(df_ensemble_input, ENSEMBLE_THETAS, ROCK_K_RANGE, pd.DataFrame(encoded_ensemble))
+    rows.append(compare('ensemble', seed, reference, run_ensemble(df_clean), run_ensemble(df_clean, True)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.reference", description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=150, help="jumlah baris sintetis per seed")
+    parser.add_argument("--seeds", type=int, default=10, help="jumlah seed data")
+    args = parser.parse_args(argv)
+
+    failures = 0
+    for seed in range(args.seeds):
+        for row in check_seed(args.rows, seed):
+            failures += not row['ok']
+            print(f"{row['data']:<10} seed {seed:>3}  {'ok' if row['ok'] else 'BERBEDA':<8} "
+                  f"acuan θ={row['acuan'][0]} k={row['acuan'][1]} CP*={row['acuan'][2]:.4f}  "
+                  f"penuh θ={row['penuh'][0]} k={row['penuh'][1]} (ΔCP* maks {row['selisih_cp_maks']:.1e})  "
+                  f"terkompresi θ={row['terkompresi'][0]} k={row['terkompresi'][1]} "
+                  f"ARI {row['ari_terkompresi']:.3f}")
+    if failures:
+        print(f"{failures} grid baris penuh menyimpang dari acuan.")
+        sys.exit(1)
+    print("Grid baris penuh sama dengan acuan.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Ukur cold start aplikasi Streamlit dan waktu render pertama halaman ringan.
+
+Setiap pengukuran berjalan di proses Python baru agar tidak ada modul yang
+sudah termuat. Waktu impor Streamlit sendiri (sama untuk semua versi app)
+tidak dihitung.
+
+Contoh:
+    python -m benchmarks.startup --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'streamlit_app.py')
+PAGES = ["🏠 Home", "📂 Upload Data"]
+HEAVY_MODULES = ['matplotlib', 'seaborn', 'scipy', 'sklearn']
+
+_PROBE = """
+import json, sys, time
+from streamlit.testing.v1 import AppTest
+app, page = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+at = AppTest.from_file(app, default_timeout=600)
+at.run()
+first_run = time.perf_counter() - start
+if page != at.sidebar.radio[0].value:
+    at.sidebar.radio[0].set_value(page).run()
+print(json.dumps({
+    'cold_start_s': first_run,
+    'first_paint_s': time.perf_counter() - start,
+    'heavy_modules': sorted({m.split('.')[0] for m in sys.modules} & set(sys.argv[3:])),
+    'errors': [str(e.value) for e in at.exception],
+}))
+"""
+
+
+def measure(app, page):
+    out = subprocess.run(
+        [sys.executable, '-c', _PROBE, app, page, *HEAVY_MODULES],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(app)
+    )
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.startup", description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=APP, help="file aplikasi Streamlit")
+    parser.add_argument("--repeat", type=int, default=3, help="jumlah proses per halaman (median dilaporkan)")
+    parser.add_argument("--output", help="tulis hasil ke file JSON")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for page in PAGES:
+        runs = [measure(os.path.abspath(args.app), page) for _ in range(args.repeat)]
+        results[page] = {
+            'cold_start_s': statistics.median(r['cold_start_s'] for r in runs),
+            'first_paint_s': statistics.median(r['first_paint_s'] for r in runs),
+            'heavy_modules': runs[-1]['heavy_modules'],
+            'errors': runs[-1]['errors'],
+        }
+        r = results[page]
+        print(f"{page:<16} cold start {r['cold_start_s']:6.2f} s  render pertama {r['first_paint_s']:6.2f} s  "
+              f"modul berat: {', '.join(r['heavy_modules']) or '-'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
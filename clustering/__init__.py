@@ -0,0 +1 @@
+"""Modul inti Clustering UMKM (AHC, ROCK, dan ensemble)."""
@@ -0,0 +1,113 @@
+"""Jalankan pipeline clustering dari command line.
+
+Contoh:
+    python -m clustering data_umkm.csv --output hasil.csv --metrics metrik.json --save-model model.joblib
+    python -m clustering umkm_baru.csv --model model.joblib --output label_baru.csv
+"""
+
+import argparse
+import json
+from contextlib import nullcontext
+
+from clustering.config import ROCK_METHODS
+from clustering.export import format_from_path, write_bundle, write_results
+from clustering.ingest import read_umkm
+from clustering.model import ClusteringModel
+from clustering.pipeline import NUMERIC_LARGE_N_THRESHOLD, run_pipeline, timed
+from clustering.trace import Tracer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m clustering", description="Clustering ensemble UMKM (AHC + ROCK) tanpa UI.")
+    parser.add_argument("input", help="file data UMKM (CSV, Parquet, atau Arrow/Feather)")
+    parser.add_argument("--output", default="hasil_clustering_ensemble.csv",
+                        help="file hasil berlabel; format mengikuti ekstensi (.csv, .csv.gz, .parquet)")
+    parser.add_argument("--bundle", help="file zip berisi hasil (Parquet), parameter/metrik per tahap, dan model")
+    parser.add_argument("--metrics", help="file JSON untuk parameter terbaik, metrik, dan waktu per tahap")
+    parser.add_argument("--compress", action="store_true",
+                        help="jalankan ROCK atas profil unik berbobot (lebih cepat, aproksimasi jalur baris penuh)")
+    parser.add_argument("--rock-sample", type=int,
+                        help="jalankan grid ROCK atas sampel acak sebesar ini lalu beri label semua baris")
+    parser.add_argument("--rock-method", choices=list(ROCK_METHODS), default="average",
+                        help="penggabungan ROCK: average linkage atas 1/link atau goodness ROCK asli")
+    parser.add_argument("--n-jobs", type=int, default=1, help="jumlah worker grid search (-1 = semua core)")
+    parser.add_argument("--large-n-threshold", type=int, default=NUMERIC_LARGE_N_THRESHOLD,
+                        help="di atas jumlah baris ini AHC berjalan atas micro-cluster")
+    parser.add_argument("--skip-evaluation", action="store_true", help="lewati perhitungan DBI")
+    parser.add_argument("--save-model", help="simpan model hasil fit untuk memberi label data baru")
+    parser.add_argument("--model", help="beri label data input dengan model tersimpan tanpa fit ulang")
+    parser.add_argument("--trace", help="file JSON jejak per tahap dan iterasi grid (wall, CPU, memori puncak)")
+    args = parser.parse_args(argv)
+
+    tracer = Tracer(memory=True) if args.trace else None
+    with tracer.activate() if tracer else nullcontext():
+        run(args)
+    if tracer:
+        with open(args.trace, "w") as f:
+            json.dump(tracer.to_dict(), f, indent=2)
+
+
+def run(args):
+    timings = {}
+    with timed('baca_data', timings):
+        df = read_umkm(args.input)
+
+    if args.model:
+        predict_new(df, args, timings)
+        return
+
+    result = run_pipeline(
+        df, compress=args.compress, evaluate=not args.skip_evaluation, n_jobs=args.n_jobs,
+        large_n_threshold=args.large_n_threshold, rock_sample_size=args.rock_sample,
+        rock_method=args.rock_method
+    )
+    timings.update(result['timings'])
+
+    model = None
+    if args.save_model or args.bundle:
+        with timed('simpan_model', timings):
+            model = ClusteringModel.from_pipeline(df, result)
+            if args.save_model:
+                model.save(args.save_model)
+
+    with timed('tulis_hasil', timings):
+        save_results(result['df'], args.output)
+        if args.bundle:
+            with open(args.bundle, "wb") as f:
+                write_bundle(result['df'], f, result['metrics'], 'parquet', model)
+
+    report(timings)
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            json.dump({'metrics': result['metrics'], 'timings': timings}, f, indent=2)
+
+
+def predict_new(df, args, timings):
+    with timed('prediksi', timings):
+        model = ClusteringModel.load(args.model)
+        labelled = model.predict(df)
+        drift = model.drift_report(df)
+    save_results(labelled, args.output)
+
+    report(timings)
+    print(f"drift: {json.dumps(drift['metrik'])}")
+    if drift['perlu_fit_ulang']:
+        print(f"⚠️ pergeseran data besar ({', '.join(drift['alasan'])}): jalankan fit ulang penuh")
+    if args.metrics:
+        with open(args.metrics, "w") as f:
+            json.dump({'drift': drift, 'timings': timings}, f, indent=2)
+
+
+def save_results(df, path):
+    with open(path, "wb") as f:
+        write_results(df, f, format_from_path(path))
+
+
+def report(timings):
+    for stage, seconds in timings.items():
+        print(f"{stage:<14} {seconds:9.3f} s")
+    print(f"{'total':<14} {sum(timings.values()):9.3f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Cache hasil per tahap pipeline, dipakai ulang antar rerun Streamlit."""
+
+import hashlib
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from clustering.trace import span
+
+
+def content_hash(obj):
+    """Hash isi DataFrame/Series/array/bytes (bukan identitas objek)."""
+    digest = hashlib.blake2b(digest_size=16)
+    if isinstance(obj, pd.DataFrame):
+        digest.update(repr((list(obj.columns), list(obj.dtypes))).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, pd.Series):
+        digest.update(repr((obj.name, obj.dtype)).encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+    elif isinstance(obj, np.ndarray):
+        digest.update(repr((obj.shape, obj.dtype.str)).encode())
+        digest.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, (bytes, bytearray)):
+        digest.update(obj)
+    else:
+        digest.update(repr(obj).encode())
+    return digest.hexdigest()
+
+
+def estimate_nbytes(value):
+    """Perkiraan ukuran memori sebuah hasil tahap."""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, dict):
+        return sum(estimate_nbytes(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(estimate_nbytes(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class StageCache:
+    """Cache LRU berbatas ukuran untuk hasil tahap (preprocessing, AHC, ROCK, dst).
+
+    Kunci = nama tahap + hash isi setiap input + parameter tahap. Entri
+    yang paling lama tidak dipakai dibuang saat total ukuran melebihi
+    ``max_bytes`` atau jumlah entri melebihi ``max_entries``. Nilai yang
+    dikembalikan dipakai bersama, jadi jangan diubah in-place.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 ** 2, max_entries=64):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, stage, inputs, params=None):
+        hashes = tuple(content_hash(obj) for obj in inputs)
+        params = tuple(sorted((params or {}).items()))
+        return stage, hashes, repr(params)
+
+    def get_or_compute(self, stage, inputs, params, compute):
+        with span(stage) as record:
+            with span('hash_input'):
+                key = self.make_key(stage, inputs, params)
+            found, value = self.lookup(key)
+            if found:
+                if record is not None:
+                    record['cache'] = 'hit'
+                return value
+
+            if record is not None:
+                record['cache'] = 'miss'
+            value = compute()
+            self.put(key, value)
+            return value
+
+    def lookup(self, key):
+        """(True, nilai) bila ``key`` ada di cache, selain itu (False, None)."""
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, self._entries[key][0]
+            self.misses += 1
+            return False, None
+
+    def put(self, key, value):
+        size = estimate_nbytes(value)
+        with self._lock:
+            if key in self._entries:
+                self._total_bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._total_bytes += size
+            while len(self._entries) > self.max_entries or self._total_bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._total_bytes -= evicted_size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,30 @@
+"""Parameter grid dan pilihan tampilan bersama, tanpa dependensi berat.
+
+Dipisah dari ``pipeline`` dan ``embedding`` agar halaman ringan (dan sidebar)
+bisa membacanya tanpa memuat scipy/scikit-learn.
+"""
+
+LINKAGE_TYPES = ['single', 'complete', 'average']
+NUMERIC_K_RANGE = range(2, 7)
+CATEGORICAL_THETAS = [0.05, 0.1, 0.12, 0.15, 0.17, 0.2, 0.22, 0.25, 0.27, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+ENSEMBLE_THETAS = [0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
+ROCK_K_RANGE = range(2, 5)
+# metode penggabungan ROCK -> nama tampilan
+ROCK_METHODS = {
+    'average': "Average linkage (jarak 1 / link)",
+    'goodness': "Goodness ROCK (heap atas link sparse)",
+}
+NUMERIC_LARGE_N_THRESHOLD = 20000
+NUMERIC_MICRO_CLUSTERS = 1000
+# Mode sampel ROCK: grid atas sampel acak, baris lain diberi label dari sampel
+ROCK_SAMPLE_SIZE = 2000
+# Di bawah jumlah baris ini aplikasi menawarkan perbandingan sampel vs run penuh
+ROCK_AGREEMENT_MAX_ROWS = 50000
+ENSEMBLE_COLS = ['cluster_numerik', 'cluster_kategorik']
+
+# mode embedding 2-D -> (nama tampilan, label sumbu)
+EMBEDDING_MODES = {
+    'sampel': ("t-SNE cepat (sampel / profil unik)", "t-SNE"),
+    'tsne': ("t-SNE penuh", "t-SNE"),
+    'pca': ("PCA (linear, paling cepat)", "PC"),
+}
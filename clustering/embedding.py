@@ -0,0 +1,99 @@
+"""Embedding 2-D untuk visualisasi klaster: t-SNE penuh, t-SNE cepat, atau PCA."""
+
+import numpy as np
+from sklearn.decomposition import PCA
+from sklearn.manifold import TSNE
+from sklearn.metrics import pairwise_distances
+from sklearn.neighbors import KNeighborsRegressor
+
+from clustering.trace import span, traced
+
+
+@traced('tsne')
+def _tsne(X, metric, random_state):
+    n = len(X)
+    # perplexity harus < jumlah titik (relevan untuk profil unik yang sedikit)
+    perplexity = min(30.0, max(n - 1, 1))
+    if metric == 'hamming':
+        dist_matrix = pairwise_distances(X, metric="hamming")
+        tsne = TSNE(n_components=2, metric='precomputed', init='random', random_state=random_state,
+                    perplexity=perplexity)
+        return tsne.fit_transform(dist_matrix)
+    return TSNE(n_components=2, random_state=random_state, perplexity=perplexity).fit_transform(X)
+
+
+@traced('pca')
+def _pca(X, random_state):
+    X = np.asarray(X, dtype=float)
+    n_components = min(2, X.shape[1], len(X))
+    embedded = PCA(n_components=n_components, random_state=random_state).fit_transform(X)
+    if n_components < 2:
+        embedded = np.hstack([embedded, np.zeros((len(X), 2 - n_components))])
+    return embedded
+
+
+def stratified_sample(labels, sample_size, rng):
+    """Indeks sampel dengan proporsi tiap label dipertahankan (minimal 1 per label)."""
+    labels = np.asarray(labels)
+    n = len(labels)
+    picked = []
+    for lbl in np.unique(labels):
+        members = np.flatnonzero(labels == lbl)
+        take = max(1, int(round(len(members) * sample_size / n)))
+        picked.append(rng.choice(members, size=min(take, len(members)), replace=False))
+    return np.sort(np.concatenate(picked))
+
+
+def _jitter(embedded, rng, scale=0.01):
+    spread = np.ptp(embedded, axis=0)
+    spread[spread == 0] = 1.0
+    return embedded + rng.normal(0, scale, embedded.shape) * spread
+
+
+def embed_2d(X, mode='sampel', metric='euclidean', labels=None, sample_size=2000, random_state=42,
+             progress=None, chunk_rows=50_000):
+    """Proyeksikan ``X`` ke 2-D untuk scatter plot.
+
+    - ``tsne``: t-SNE atas semua baris (seperti sebelumnya, O(n²)).
+    - ``sampel``: untuk metrik ``hamming`` t-SNE dijalankan atas profil
+      unik lalu disebarkan ke setiap baris (dengan jitter kecil); untuk
+      data numerik t-SNE dijalankan atas sampel terstratifikasi per label
+      lalu baris lain diproyeksikan dengan k-NN ke titik sampel.
+    - ``pca``: proyeksi linear, cocok untuk data sangat besar.
+
+    ``progress`` dipanggil dengan fraksi selesai di antara fase (setelah
+    t-SNE sampel dan per ``chunk_rows`` baris proyeksi k-NN), sehingga job
+    bisa dibatalkan di titik itu; satu pemanggilan t-SNE tidak bisa disela.
+    """
+    X = np.asarray(X, dtype=float)
+    rng = np.random.default_rng(random_state)
+    if progress is None:
+        def progress(fraction):
+            pass
+    progress(0.0)
+
+    if mode == 'pca':
+        return _pca(X, random_state)
+    if mode == 'tsne':
+        return _tsne(X, metric, random_state)
+
+    if metric == 'hamming':
+        profiles, inverse = np.unique(X, axis=0, return_inverse=True)
+        if len(profiles) <= sample_size:
+            embedded = _tsne(profiles, metric, random_state) if len(profiles) > 3 else _pca(profiles, random_state)
+            return _jitter(embedded[inverse.ravel()], rng)
+
+    if len(X) <= sample_size:
+        return _tsne(X, metric, random_state)
+
+    sample = stratified_sample(labels if labels is not None else np.zeros(len(X)), sample_size, rng)
+    embedded_sample = _tsne(X[sample], metric, random_state)
+    progress(0.5)
+    with span('knn_proyeksi'):
+        knn = KNeighborsRegressor(n_neighbors=5, weights='distance', metric=metric).fit(X[sample], embedded_sample)
+        embedded = np.empty((len(X), 2))
+        for start in range(0, len(X), chunk_rows):
+            embedded[start:start + chunk_rows] = knn.predict(X[start:start + chunk_rows])
+            progress(0.5 + 0.5 * min(start + chunk_rows, len(X)) / len(X))
+    embedded[sample] = embedded_sample
+    return embedded
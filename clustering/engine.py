@@ -0,0 +1,747 @@
+"""Fungsi inti ROCK dan AHC yang dipakai bersama oleh halaman-halaman clustering."""
+
+import heapq
+
+import numpy as np
+import pandas as pd
+from scipy import sparse
+from scipy.cluster.hierarchy import fcluster, linkage
+from sklearn.cluster import MiniBatchKMeans
+from sklearn.metrics import pairwise_distances
+from sklearn.preprocessing import LabelEncoder
+
+from clustering.parallel import run_tasks
+from clustering.trace import span, traced
+
+
+def encode_categorical(df_cat):
+    """Label-encode setiap kolom kategorik."""
+    encoded = pd.DataFrame()
+    for col in df_cat.columns:
+        le = LabelEncoder()
+        encoded[col] = le.fit_transform(df_cat[col])
+    return encoded
+
+
+@traced('pairwise_distances')
+def jaccard_similarity_matrix(encoded):
+    return 1 - pairwise_distances(encoded, metric="hamming")
+
+
+def get_neighbors(sim_matrix, theta):
+    n = sim_matrix.shape[0]
+    neighbors = [set(np.where(sim_matrix[i] >= theta)[0]) - {i} for i in range(n)]
+    return neighbors
+
+
+def factorize_columns(encoded):
+    """Kode integer 0..V_d-1 per kolom dengan dtype terkecil yang cukup."""
+    values = np.asarray(encoded)
+    codes = np.empty(values.shape, dtype=np.int64)
+    for d in range(values.shape[1]):
+        codes[:, d] = np.unique(values[:, d], return_inverse=True)[1].ravel()
+    max_code = int(codes.max()) if codes.size else 0
+    return codes.astype(np.min_scalar_type(max_code))
+
+
+def _neighbor_mask(n_cols, theta):
+    """Tabel: apakah m kolom yang sama sudah membuat dua baris bertetangga (m = 0..n_cols)."""
+    # Similarity hanya bisa bernilai 1 - (n_cols - m) / n_cols, m = jumlah kolom yang sama
+    matches = np.arange(n_cols + 1)
+    return (1 - (n_cols - matches) / n_cols) >= theta
+
+
+@traced('neighbor_graph')
+def neighbor_graph(codes, theta, block_size=1024):
+    """Graf tetangga sparse (CSR) untuk similarity Hamming ≥ theta, dihitung per blok baris.
+
+    Hanya satu tile (block_size × n) jumlah kecocokan yang hidup di memori,
+    sehingga memori puncak sebanding dengan ukuran tile dan jumlah edge,
+    bukan n². Hasilnya identik dengan ``get_neighbors`` pada matriks penuh.
+    """
+    n, n_cols = codes.shape
+    is_neighbor = _neighbor_mask(n_cols, theta)
+    count_dtype = np.min_scalar_type(n_cols)
+
+    degree = np.zeros(n, dtype=np.int64)
+    col_blocks = []
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        tile = codes[start:stop]
+        match_count = np.zeros((stop - start, n), dtype=count_dtype)
+        for d in range(n_cols):
+            match_count += tile[:, d, None] == codes[None, :, d]
+        mask = is_neighbor[match_count]
+        local = np.arange(stop - start)
+        mask[local, start + local] = False
+        degree[start:stop] = mask.sum(axis=1)
+        col_blocks.append(np.nonzero(mask)[1].astype(np.int32))
+
+    cols = np.concatenate(col_blocks) if col_blocks else np.empty(0, dtype=np.int32)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(degree, out=indptr[1:])
+    data = np.ones(len(cols), dtype=np.int8)
+    return sparse.csr_matrix((data, cols, indptr), shape=(n, n))
+
+
+def neighbors_to_adjacency(neighbors):
+    """Ubah daftar himpunan tetangga menjadi matriks ketetanggaan sparse (CSR)."""
+    n = len(neighbors)
+    lengths = np.fromiter((len(nb) for nb in neighbors), dtype=np.int64, count=n)
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(lengths, out=indptr[1:])
+    indices = np.fromiter(
+        (j for nb in neighbors for j in sorted(nb)), dtype=np.int32, count=int(indptr[-1])
+    )
+    data = np.ones(len(indices), dtype=np.int32)
+    return sparse.csr_matrix((data, indices, indptr), shape=(n, n))
+
+
+@traced('calculate_links')
+def calculate_links(neighbors, block_size=2048):
+    """Hitung jumlah tetangga bersama (link) untuk semua pasangan sekaligus.
+
+    link(i, j) = |N(i) ∩ N(j)| = (A·Aᵀ)[i, j], dihitung per blok baris agar
+    memori puncak tetap terbatas. Diagonal diset 0 seperti versi lama.
+    """
+    if sparse.issparse(neighbors):
+        adjacency = neighbors.tocsr().astype(np.int32)
+    else:
+        adjacency = neighbors_to_adjacency(neighbors)
+    n = adjacency.shape[0]
+    adjacency_t = adjacency.T.tocsr()
+    links = np.zeros((n, n), dtype=int)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        links[start:stop] = (adjacency[start:stop] @ adjacency_t).toarray()
+        rows = np.arange(start, stop)
+        links[rows, rows] = 0
+    return links
+
+
+@traced('link_distance')
+def link_distance_condensed(adjacency, block_size=1024):
+    """Jarak ROCK 1 / (link + 1e-5) langsung dalam bentuk condensed (segitiga atas).
+
+    Link dihitung per blok baris dari graf tetangga sparse, sehingga matriks
+    link dan jarak n×n penuh tidak pernah dibuat.
+    """
+    adjacency = adjacency.tocsr().astype(np.int32)
+    adjacency_t = adjacency.T.tocsr()
+    n = adjacency.shape[0]
+    condensed = np.empty(n * (n - 1) // 2)
+    for start in range(0, n, block_size):
+        stop = min(start + block_size, n)
+        links = (adjacency[start:stop] @ adjacency_t).toarray()
+        for i in range(start, stop):
+            offset = i * n - i * (i + 1) // 2
+            condensed[offset:offset + n - i - 1] = 1 / (links[i - start, i + 1:] + 1e-5)
+    return condensed
+
+
+def rock_linkage(codes, theta, block_size=1024):
+    """Bangun pohon average linkage ROCK untuk satu nilai theta."""
+    graph = neighbor_graph(codes, theta, block_size)
+    condensed_dist = link_distance_condensed(graph, block_size)
+    with span('linkage'):
+        return linkage(condensed_dist, method='average')
+
+
+def rock_clustering(df_cat, theta, k_opt, method='average'):
+    encoded = encode_categorical(df_cat)
+    codes = factorize_columns(encoded)
+    if method == 'goodness':
+        merges = rock_merge(row_links(neighbor_graph(codes, theta)), theta, min_clusters=k_opt)
+        return cut_tree_labels(merges, [k_opt], n_leaves=len(codes))[k_opt] + 1, encoded
+    linkage_matrix = rock_linkage(codes, theta)
+    labels = fcluster(linkage_matrix, t=k_opt, criterion='maxclust')
+    return labels, encoded
+
+
+def compute_cp_star(encoded, labels, weights=None):
+    """CP* = (1/N) Σ_k n_k · rata-rata similarity antar pasangan dalam klaster k.
+
+    Jika ``weights`` diberikan, setiap baris ``encoded`` adalah profil unik
+    yang mewakili ``weights[i]`` baris data asli.
+    """
+    return cp_star_from_codes(factorize_columns(encoded), labels, weights)
+
+
+@traced('cp_star')
+def cp_star_from_codes(codes, labels, weights=None):
+    """CP* dari hitungan kategori per klaster, tanpa matriks similarity.
+
+    Similarity Hamming = (1/D) Σ_d [x_id = x_jd], sehingga jumlah similarity
+    antar pasangan dalam klaster k = (1/D) Σ_d Σ_v C(c_kdv, 2), dengan c_kdv
+    banyaknya baris di klaster k yang bernilai v pada kolom d.
+    """
+    _, label_index = np.unique(labels, return_inverse=True)
+    label_index = label_index.ravel()
+    n_clusters = label_index.max() + 1
+    if weights is None:
+        weights = np.ones(len(label_index))
+    weights = np.asarray(weights, dtype=float)
+
+    n_k = np.bincount(label_index, weights=weights, minlength=n_clusters)
+    same_pairs = np.zeros(n_clusters)
+    for d in range(codes.shape[1]):
+        n_values = int(codes[:, d].max()) + 1
+        counts = np.bincount(
+            label_index * n_values + codes[:, d].astype(np.int64), weights=weights, minlength=n_clusters * n_values
+        ).reshape(n_clusters, n_values)
+        same_pairs += (counts * (counts - 1) / 2).sum(axis=1)
+
+    valid = n_k > 1
+    sim_sum = same_pairs[valid] / codes.shape[1]
+    sim_avg = sim_sum / (n_k[valid] * (n_k[valid] - 1) / 2)
+    return np.sum(n_k[valid] * sim_avg) / weights.sum()
+
+
+def categorical_profiles(encoded):
+    """Kelompokkan baris identik menjadi profil unik.
+
+    Mengembalikan (indeks baris pertama tiap profil, jumlah baris per profil,
+    indeks profil untuk setiap baris asli).
+    """
+    values = np.asarray(encoded)
+    _, first_index, inverse, counts = np.unique(
+        values, axis=0, return_index=True, return_inverse=True, return_counts=True
+    )
+    return first_index, counts, inverse.ravel()
+
+
+@traced('linkage')
+def weighted_average_linkage(dist, weights):
+    """Average linkage (UPGMA) atas titik berbobot, format keluaran sama dengan scipy.
+
+    Jarak antar gabungan dihitung dengan Lance–Williams memakai bobot
+    ``weights``, sehingga setara dengan average linkage atas semua baris
+    asli bila baris dalam satu profil tergabung lebih dulu. Pohon baris
+    penuh tidak selalu begitu (dan memecah tinggi kembar dengan urutan
+    lain), jadi hasilnya aproksimasi.
+
+    Tetangga terdekat tiap baris disimpan, sehingga setiap langkah hanya
+    memperbarui baris gabungan dan baris yang tetangganya berubah: O(u²)
+    total. Tinggi kembar dipecah ke indeks terkecil (urutan baris-kolom).
+    """
+    u = len(weights)
+    dist = np.array(dist, dtype=float)
+    np.fill_diagonal(dist, np.inf)
+    sizes = np.asarray(weights, dtype=float).copy()
+    leaves = np.ones(u)
+    ids = np.arange(u)
+    active = np.ones(u, dtype=bool)
+    linkage_matrix = np.zeros((max(u - 1, 0), 4))
+    nearest = np.argmin(dist, axis=1)
+    nearest_dist = dist[np.arange(u), nearest]
+
+    for step in range(u - 1):
+        i = int(np.argmin(nearest_dist))
+        j = int(nearest[i])
+        if i > j:
+            i, j = j, i
+        linkage_matrix[step] = [min(ids[i], ids[j]), max(ids[i], ids[j]), dist[i, j], leaves[i] + leaves[j]]
+
+        merged = (sizes[i] * dist[i] + sizes[j] * dist[j]) / (sizes[i] + sizes[j])
+        dist[i] = merged
+        dist[:, i] = merged
+        dist[i, i] = np.inf
+        dist[j] = np.inf
+        dist[:, j] = np.inf
+        active[j] = False
+        nearest_dist[j] = np.inf
+        sizes[i] += sizes[j]
+        leaves[i] += leaves[j]
+        ids[i] = u + step
+
+        # Jarak ke gabungan ada di antara jarak ke i dan j, jadi baris lain hanya
+        # berubah bila tetangganya i/j atau kolom i kini sama dekat dengan indeks lebih kecil
+        stale = np.flatnonzero(active & ((nearest == i) | (nearest == j)))
+        stale = np.append(stale[stale != i], i)
+        nearest[stale] = np.argmin(dist[stale], axis=1)
+        nearest_dist[stale] = dist[stale, nearest[stale]]
+        column = dist[:, i]
+        closer = active & ((column < nearest_dist) | ((column == nearest_dist) & (i < nearest)))
+        closer[i] = False
+        nearest[closer] = i
+        nearest_dist[closer] = column[closer]
+
+    return linkage_matrix
+
+
+def weighted_rock_linkage(sim_matrix, theta, counts):
+    """Pohon ROCK atas profil unik berbobot ``counts``.
+
+    Link antar baris hanya bergantung pada profilnya:
+    link(a, b) = Σ_c n_c B_ac B_bc − B_aa B_ab − B_ab B_bb, dengan B matriks
+    ketetanggaan antar profil (tetangga dirinya sendiri tidak dihitung).
+    """
+    dist = 1 / (profile_links(sim_matrix, theta, counts) + 1e-5)
+    return weighted_average_linkage(dist, counts)
+
+
+def profile_links(sim_matrix, theta, counts):
+    """Link antara satu baris profil a dan satu baris profil b (matriks padat profil × profil)."""
+    adjacency = (sim_matrix >= theta).astype(np.int64)
+    self_adj = np.diag(adjacency)
+    # Perkalian float64 memakai BLAS (matmul integer tidak) dan tetap eksak: jumlah link < 2^53
+    weighted = counts[:, None] * adjacency.astype(float)
+    links = np.rint(adjacency.astype(float) @ weighted).astype(np.int64)
+    links -= self_adj[:, None] * adjacency + adjacency * self_adj[None, :]
+    return links
+
+
+@traced('calculate_links')
+def row_links(adjacency):
+    """Link antar baris sebagai matriks sparse simetris tanpa diagonal (hanya pasangan ber-link)."""
+    adjacency = adjacency.tocsr().astype(np.int32)
+    links = (adjacency @ adjacency.T).tocsr()
+    links.setdiag(0)
+    links.eliminate_zeros()
+    return links
+
+
+@traced('rock_merge')
+def rock_merge(links, theta, min_clusters=1, sizes=None):
+    """Agglomerasi ROCK asli atas link sparse dengan heap lokal dan global.
+
+    ``links`` adalah matriks sparse simetris berisi jumlah link antar klaster
+    awal (baris, atau profil berbobot ``sizes``). Link antar klaster disimpan
+    sebagai dict per klaster, jadi memori sebanding dengan jumlah pasangan
+    ber-link. Setiap klaster punya heap lokal goodness terhadap tetangganya,
+    yaitu link dibagi jumlah link yang diharapkan dari gabungan:
+
+        g(a, b) = link / ((n_a + n_b)^(1+2f) − n_a^(1+2f) − n_b^(1+2f)), f = f(θ).
+
+    Heap global menyimpan kandidat terbaik tiap klaster. Entri usang tidak
+    dihapus, cukup dilewati saat diambil (lazy deletion).
+
+    Penggabungan berhenti pada ``min_clusters`` klaster. Jika tidak ada lagi
+    pasangan ber-link sebelum itu, dua klaster terkecil digabung (goodness 0)
+    agar setiap k tetap menghasilkan tepat k klaster.
+
+    Mengembalikan riwayat merge berformat linkage scipy (id klaster baru
+    n + langkah); kolom ketiga berisi goodness, bukan jarak, sehingga
+    dipotong dengan ``cut_tree_labels``, bukan ``fcluster``.
+    """
+    links = sparse.csr_matrix(links)
+    n = links.shape[0]
+    size = (np.ones(n) if sizes is None else np.asarray(sizes, dtype=float)).tolist()
+    # n^(1+2f) per klaster disimpan agar goodness cukup satu pangkat per pasangan
+    exponent = 1 + 2 * rock_f(theta)
+    power = [value ** exponent for value in size]
+
+    def negative_goodness(count, a, b):
+        return -count / ((size[a] + size[b]) ** exponent - power[a] - power[b])
+    leaves = [1] * n
+    active = [True] * n
+    neighbors = [
+        dict(zip(links.indices[links.indptr[i]:links.indptr[i + 1]].tolist(),
+                 links.data[links.indptr[i]:links.indptr[i + 1]].tolist()))
+        for i in range(n)
+    ]
+    for i in range(n):
+        neighbors[i].pop(i, None)
+
+    local = []
+    global_heap = []
+    for i in range(n):
+        heap = [(negative_goodness(count, i, j), j) for j, count in neighbors[i].items()]
+        heapq.heapify(heap)
+        local.append(heap)
+        if heap:
+            global_heap.append((heap[0][0], i, heap[0][1]))
+    heapq.heapify(global_heap)
+
+    def best_of(i):
+        heap = local[i]
+        while heap and not active[heap[0][1]]:
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    merges = []
+    n_clusters = n
+    while n_clusters > min_clusters and global_heap:
+        neg_goodness, a, b = heapq.heappop(global_heap)
+        if not active[a]:
+            continue
+        if not active[b]:
+            # Kandidat a sudah tergabung ke klaster lain; ambil kandidat terbaik berikutnya
+            top = best_of(a)
+            if top is not None:
+                heapq.heappush(global_heap, (top[0], a, top[1]))
+            continue
+
+        new = len(size)
+        merged = neighbors[a]
+        other = neighbors[b]
+        if len(merged) < len(other):
+            merged, other = other, merged
+        for x, count in other.items():
+            merged[x] = merged.get(x, 0) + count
+        merged.pop(a, None)
+        merged.pop(b, None)
+        neighbors[a] = neighbors[b] = None
+        local[a] = local[b] = None
+        active[a] = active[b] = False
+
+        size.append(size[a] + size[b])
+        power.append(size[new] ** exponent)
+        leaves.append(leaves[a] + leaves[b])
+        active.append(True)
+        neighbors.append(merged)
+        merges.append([min(a, b), max(a, b), -neg_goodness, leaves[new]])
+        n_clusters -= 1
+
+        heap = []
+        for x, count in merged.items():
+            goodness = negative_goodness(count, new, x)
+            heap.append((goodness, x))
+            linked = neighbors[x]
+            linked.pop(a, None)
+            linked.pop(b, None)
+            linked[new] = count
+            heapq.heappush(local[x], (goodness, new))
+            if local[x][0][1] == new:
+                heapq.heappush(global_heap, (goodness, x, new))
+        heapq.heapify(heap)
+        local.append(heap)
+        if heap:
+            heapq.heappush(global_heap, (heap[0][0], new, heap[0][1]))
+
+    # Klaster tanpa link tersisa: gabung yang terkecil lebih dulu hingga min_clusters
+    remaining = [(size[i], i) for i in range(len(size)) if active[i]]
+    heapq.heapify(remaining)
+    while n_clusters > min_clusters:
+        (size_a, a), (size_b, b) = heapq.heappop(remaining), heapq.heappop(remaining)
+        new = len(size)
+        size.append(size_a + size_b)
+        leaves.append(leaves[a] + leaves[b])
+        merges.append([min(a, b), max(a, b), 0.0, leaves[new]])
+        heapq.heappush(remaining, (size[new], new))
+        n_clusters -= 1
+
+    return np.array(merges, dtype=float).reshape(-1, 4)
+
+
+def rock_f(theta):
+    """f(θ) = (1 - θ) / (1 + θ); klaster berukuran n diharapkan punya ±n^(1+2f(θ)) link."""
+    return (1 - theta) / (1 + theta)
+
+
+def rock_label_scores(neighbor_counts, cluster_sizes, theta):
+    """Skor pelabelan ROCK N_c / (n_c + 1)^f(θ) untuk setiap baris × klaster."""
+    return neighbor_counts / (cluster_sizes + 1) ** rock_f(theta)
+
+
+@traced('rock_label')
+def rock_label_rows(codes, sample_index, sample_labels, theta, block_size=4096):
+    """Beri label semua baris dari hasil ROCK atas sampel ``sample_index``.
+
+    Baris dikelompokkan menjadi profil unik. Profil yang muncul di sampel
+    mendapat klaster mayoritasnya di sampel; profil lain mendapat klaster
+    dengan ``rock_label_scores`` tertinggi, dengan N_c jumlah baris sampel di
+    klaster c yang bertetangga (similarity ≥ θ). Kecocokan dihitung per blok
+    profil × profil sampel, jadi tidak ada matriks n × n.
+    """
+    profiles, inverse = np.unique(codes, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    clusters, label_index = np.unique(sample_labels, return_inverse=True)
+    n_clusters = len(clusters)
+    counts = np.bincount(
+        inverse[sample_index] * n_clusters + label_index.ravel(), minlength=len(profiles) * n_clusters
+    ).reshape(len(profiles), n_clusters)
+
+    chosen = np.argmax(counts, axis=1)
+    in_sample = counts.sum(axis=1) > 0
+    unseen = np.flatnonzero(~in_sample)
+    sample_profiles = profiles[in_sample]
+    sample_counts = counts[in_sample].astype(float)
+    cluster_sizes = counts.sum(axis=0)
+    is_neighbor = _neighbor_mask(codes.shape[1], theta)
+    for start in range(0, len(unseen), block_size):
+        block = profiles[unseen[start:start + block_size]]
+        match_count = np.zeros((len(block), len(sample_profiles)), dtype=np.min_scalar_type(codes.shape[1]))
+        for d in range(codes.shape[1]):
+            match_count += block[:, d, None] == sample_profiles[None, :, d]
+        neighbor_counts = is_neighbor[match_count].astype(float) @ sample_counts
+        scores = rock_label_scores(neighbor_counts, cluster_sizes, theta)
+        chosen[unseen[start:start + block_size]] = np.argmax(scores, axis=1)
+    return clusters[chosen][inverse]
+
+
+def _rock_goodness_cuts(theta, k_range, codes, sim_matrix, counts):
+    """Label (1..k) untuk setiap k dari satu riwayat ``rock_merge``."""
+    if counts is not None:
+        # Profil identik dianggap sudah tergabung; link antar profil = link per baris × n_a × n_b
+        links = profile_links(sim_matrix, theta, counts) * np.outer(counts, counts)
+        np.fill_diagonal(links, 0)
+        merges = rock_merge(sparse.csr_matrix(links), theta, min(k_range), sizes=counts)
+        n_leaves = len(counts)
+    else:
+        merges = rock_merge(row_links(neighbor_graph(codes, theta)), theta, min(k_range))
+        n_leaves = len(codes)
+    return {k: labels + 1 for k, labels in cut_tree_labels(merges, k_range, n_leaves).items()}
+
+
+def _rock_theta_candidates(theta, k_range, codes, sim_matrix, counts, cp_codes, cp_weights, method='average'):
+    """Satu pohon ROCK untuk ``theta`` lalu (k, label, CP*) untuk setiap k."""
+    with span('rock_theta', theta=theta):
+        if method == 'goodness':
+            cuts = _rock_goodness_cuts(theta, k_range, codes, sim_matrix, counts)
+            return [(k_opt, cuts[k_opt], cp_star_from_codes(cp_codes, cuts[k_opt], cp_weights)) for k_opt in k_range]
+        if counts is not None:
+            linkage_matrix = weighted_rock_linkage(sim_matrix, theta, counts) if len(counts) > 1 else None
+        else:
+            linkage_matrix = rock_linkage(codes, theta)
+
+        candidates = []
+        for k_opt in k_range:
+            if linkage_matrix is None:
+                labels = np.ones(len(counts), dtype=np.int32)
+            else:
+                labels = fcluster(linkage_matrix, t=k_opt, criterion='maxclust')
+            candidates.append((k_opt, labels, cp_star_from_codes(cp_codes, labels, cp_weights)))
+        return candidates
+
+
+def rock_grid_search(df_cat, theta_list, k_range, cp_encoded=None, progress=None, compress=False,
+                     n_jobs=1, backend='loky', sample_size=None, random_state=42, method='average'):
+    """Cari kombinasi (theta, k) dengan CP* tertinggi.
+
+    Encoding dan similarity dihitung sekali per dataset, link dan pohon
+    linkage sekali per theta, lalu setiap k cukup memotong pohon tersebut.
+    ``cp_encoded`` adalah representasi untuk CP* (default: hasil encoding
+    ``df_cat``); ``progress`` dipanggil dengan fraksi kandidat yang selesai.
+
+    Dengan ``compress=True`` baris identik digabung menjadi profil unik
+    berbobot sehingga biaya bergantung pada jumlah profil, bukan n².
+    Label profil kemudian disebarkan kembali ke setiap baris asli. Mode ini
+    aproksimasi: baris identik selalu satu klaster dan tinggi kembar pecah
+    dengan urutan lain, sehingga (theta, k) dan label bisa berbeda dari
+    jalur baris penuh (default), yang menjadi acuan.
+
+    Setiap theta dapat dikerjakan paralel (``n_jobs``); hasil tetap
+    diproses berurutan sehingga kandidat terbaik sama dengan versi serial.
+
+    Dengan ``sample_size`` lebih kecil dari jumlah baris, grid dan seleksi
+    CP* berjalan atas sampel acak, lalu semua baris diberi label dengan
+    ``rock_label_rows`` (lihat ``rock_sample_grid_search``).
+
+    ``method='average'`` memakai average linkage atas jarak 1 / link;
+    ``method='goodness'`` memakai agglomerasi ROCK asli (``rock_merge``).
+    """
+    encoded = encode_categorical(df_cat)
+    if cp_encoded is None:
+        cp_encoded = encoded
+    cp_encoded = pd.DataFrame(cp_encoded)
+    if sample_size is not None and len(encoded) > sample_size:
+        return rock_sample_grid_search(
+            encoded, theta_list, k_range, cp_encoded, sample_size, random_state,
+            progress=progress, compress=compress, n_jobs=n_jobs, backend=backend, method=method
+        )
+
+    if compress:
+        first_index, counts, inverse = categorical_profiles(
+            np.hstack([encoded.to_numpy(dtype=float), cp_encoded.to_numpy(dtype=float)])
+        )
+        codes = None
+        sim_matrix = jaccard_similarity_matrix(encoded.iloc[first_index])
+        cp_codes = factorize_columns(cp_encoded.iloc[first_index])
+        cp_weights = counts
+    else:
+        counts = None
+        codes = factorize_columns(encoded)
+        sim_matrix = None
+        cp_codes = factorize_columns(cp_encoded)
+        cp_weights = None
+
+    best = {'theta': None, 'k': None, 'CP': -np.inf, 'labels': None}
+    results = []
+    total = len(theta_list) * len(k_range)
+    tasks = [(theta, k_range, codes, sim_matrix, counts, cp_codes, cp_weights, method) for theta in theta_list]
+
+    for theta, candidates in zip(theta_list, run_tasks(_rock_theta_candidates, tasks, n_jobs, backend)):
+        for k_opt, labels, cp_star in candidates:
+            results.append((theta, k_opt, cp_star))
+            if cp_star > best['CP']:
+                best = {'theta': theta, 'k': k_opt, 'CP': cp_star, 'labels': labels}
+            if progress is not None:
+                progress(len(results) / total)
+
+    if compress:
+        best['labels'] = best['labels'][inverse]
+    best['encoded'] = encoded
+    best['results'] = results
+    best['method'] = method
+    return best
+
+
+def rock_sample_grid_search(encoded, theta_list, k_range, cp_encoded, sample_size, random_state=42, **grid_kwargs):
+    """Grid ROCK atas ``sample_size`` baris acak, lalu label untuk semua baris.
+
+    ``CP`` dihitung ulang atas seluruh baris berlabel; CP* sampel disimpan di
+    ``CP_sampel`` dan indeks sampel di ``sample_index``.
+    """
+    rng = np.random.default_rng(random_state)
+    sample = np.sort(rng.choice(len(encoded), size=sample_size, replace=False))
+    best = rock_grid_search(
+        encoded.iloc[sample].reset_index(drop=True), theta_list, k_range,
+        cp_encoded=cp_encoded.iloc[sample].reset_index(drop=True), **grid_kwargs
+    )
+    labels = rock_label_rows(factorize_columns(encoded), sample, best['labels'], best['theta'])
+    best.update({
+        'labels': labels, 'encoded': encoded, 'sample_index': sample, 'CP_sampel': best['CP'],
+        'CP': cp_star_from_codes(factorize_columns(cp_encoded), labels),
+    })
+    return best
+
+
+def cut_tree_labels(linkage_matrix, k_values, n_leaves=None):
+    """Potong satu pohon linkage untuk banyak k sekaligus.
+
+    Urutan merge diputar ulang (gabung anggota yang kecil ke yang besar),
+    sehingga setiap k menghasilkan tepat k klaster. Label 0..k-1 diberikan
+    menurut urutan kemunculan pertama. ``n_leaves`` diperlukan bila riwayat
+    merge berhenti sebelum satu klaster (mis. ``rock_merge``).
+    """
+    n = linkage_matrix.shape[0] + 1 if n_leaves is None else n_leaves
+    assignment = np.arange(n)
+    members = {i: [i] for i in range(n)}
+    slot_of_node = {i: i for i in range(n)}
+    cuts = {}
+    n_merges = 0
+
+    for k in sorted(set(k_values), reverse=True):
+        while n - n_merges > k:
+            slot_a = slot_of_node.pop(int(linkage_matrix[n_merges, 0]))
+            slot_b = slot_of_node.pop(int(linkage_matrix[n_merges, 1]))
+            if len(members[slot_a]) < len(members[slot_b]):
+                slot_a, slot_b = slot_b, slot_a
+            moved = members.pop(slot_b)
+            assignment[moved] = slot_a
+            members[slot_a].extend(moved)
+            slot_of_node[n + n_merges] = slot_a
+            n_merges += 1
+
+        _, first_index, inverse = np.unique(assignment, return_index=True, return_inverse=True)
+        rank = np.empty(len(first_index), dtype=np.int64)
+        rank[np.argsort(first_index)] = np.arange(len(first_index))
+        cuts[k] = rank[inverse.ravel()]
+
+    return cuts
+
+
+@traced('pseudo_f_icd')
+def pseudo_f_icd(X, labels, k):
+    """Pseudo-F dan ICD dari jumlahan per klaster (bincount), tanpa loop mask."""
+    n = len(X)
+    counts = np.bincount(labels, minlength=k)
+    sums = np.stack([np.bincount(labels, weights=X[:, j], minlength=k) for j in range(X.shape[1])], axis=1)
+    means = sums / counts[:, None]
+    global_mean = np.mean(X, axis=0)
+
+    SW = np.sum((X - means[labels]) ** 2)
+    SB = np.sum(counts * np.sum((means - global_mean) ** 2, axis=1))
+    pseudoF = (SB / (k - 1)) / (SW / (n - k)) if SW != 0 else np.inf
+    ICD = SW / n
+    return pseudoF, ICD
+
+
+@traced('micro_cluster')
+def micro_cluster_summaries(X, n_micro=1000, random_state=42):
+    """Ringkas data numerik menjadi micro-cluster (MiniBatchKMeans) beserta CF-nya.
+
+    Mengembalikan (micro-cluster tiap baris, N, LS, SS) dengan N jumlah
+    anggota, LS jumlah vektor, dan SS jumlah kuadrat norma per micro-cluster.
+    """
+    n_micro = min(n_micro, len(X))
+    model = MiniBatchKMeans(n_clusters=n_micro, random_state=random_state, batch_size=4096, n_init=3)
+    assign = model.fit_predict(X)
+    # Buang micro-cluster kosong agar indeks rapat
+    _, assign = np.unique(assign, return_inverse=True)
+    assign = assign.ravel()
+    m = assign.max() + 1
+    N = np.bincount(assign, minlength=m).astype(float)
+    LS = np.stack([np.bincount(assign, weights=X[:, j], minlength=m) for j in range(X.shape[1])], axis=1)
+    SS = np.bincount(assign, weights=np.einsum('ij,ij->i', X, X), minlength=m)
+    return assign, N, LS, SS
+
+
+@traced('pseudo_f_icd')
+def pseudo_f_icd_summary(N, LS, SS, labels, k):
+    """Pseudo-F dan ICD persis untuk pengelompokan micro-cluster, hanya dari CF-nya."""
+    n = N.sum()
+    n_c = np.bincount(labels, weights=N, minlength=k)
+    LS_c = np.stack([np.bincount(labels, weights=LS[:, j], minlength=k) for j in range(LS.shape[1])], axis=1)
+    SS_c = np.bincount(labels, weights=SS, minlength=k)
+    global_mean = LS.sum(axis=0) / n
+
+    SW = np.sum(SS_c - np.sum(LS_c ** 2, axis=1) / n_c)
+    SB = np.sum(n_c * np.sum((LS_c / n_c[:, None] - global_mean) ** 2, axis=1))
+    pseudoF = (SB / (k - 1)) / (SW / (n - k)) if SW != 0 else np.inf
+    ICD = SW / n
+    return pseudoF, ICD
+
+
+def _ahc_summary_link_candidates(link, N, LS, SS, k_range):
+    """Seperti ``_ahc_link_candidates`` tetapi atas centroid micro-cluster."""
+    with span('ahc_link', link=link):
+        with span('linkage'):
+            tree = linkage(LS / N[:, None], method=link)
+        cuts = cut_tree_labels(tree, k_range)
+        return tree, [(k, cuts[k]) + pseudo_f_icd_summary(N, LS, SS, cuts[k], k) for k in k_range]
+
+
+def _ahc_link_candidates(link, X_scaled, k_range):
+    """Satu pohon linkage untuk ``link`` lalu (k, label, Pseudo-F, ICD) untuk setiap k."""
+    with span('ahc_link', link=link):
+        with span('linkage'):
+            tree = linkage(X_scaled, method=link)
+        cuts = cut_tree_labels(tree, k_range)
+        return tree, [(k, cuts[k]) + pseudo_f_icd(X_scaled, cuts[k], k) for k in k_range]
+
+
+def ahc_grid_search(X_scaled, linkage_types=('single', 'complete', 'average'), k_range=range(2, 7),
+                    n_jobs=1, backend='loky', large_n_threshold=None, n_micro=1000, progress=None):
+    """Sweep AHC: satu pohon linkage per metode, semua k dipotong dari pohon itu.
+
+    Pohon metode terbaik ikut dikembalikan (``linkage_matrix``) agar bisa
+    dipakai ulang untuk dendrogram. Metode linkage dapat dikerjakan
+    paralel (``n_jobs``) tanpa mengubah hasil.
+
+    Jika jumlah baris melebihi ``large_n_threshold``, data diringkas dulu
+    menjadi ``n_micro`` micro-cluster; linkage dan seleksi Pseudo-F/ICD
+    berjalan atas ringkasan itu (Pseudo-F/ICD tetap persis untuk seluruh
+    baris), lalu setiap baris mewarisi klaster micro-cluster-nya.
+
+    ``progress`` dipanggil dengan fraksi kandidat yang selesai.
+    """
+    summarized = large_n_threshold is not None and len(X_scaled) > large_n_threshold
+    if summarized:
+        assign, N, LS, SS = micro_cluster_summaries(X_scaled, n_micro)
+        tasks = [(link, N, LS, SS, k_range) for link in linkage_types]
+        task_func = _ahc_summary_link_candidates
+    else:
+        tasks = [(link, X_scaled, k_range) for link in linkage_types]
+        task_func = _ahc_link_candidates
+
+    best = {'k': None, 'link': None, 'PseudoF': -np.inf, 'ICD': np.inf, 'labels': None}
+    results = []
+    trees = {}
+
+    for link, (tree, candidates) in zip(linkage_types, run_tasks(task_func, tasks, n_jobs, backend)):
+        trees[link] = tree
+        for k, labels, pseudoF, ICD in candidates:
+            results.append((link, k, pseudoF, ICD))
+            if pseudoF > best['PseudoF']:
+                best = {'k': k, 'link': link, 'PseudoF': pseudoF, 'ICD': ICD, 'labels': labels}
+            if progress is not None:
+                progress(len(results) / (len(linkage_types) * len(k_range)))
+
+    if summarized:
+        best['labels'] = best['labels'][assign]
+    best['linkage_matrix'] = trees[best['link']]
+    best['results'] = results
+    best['summarized'] = summarized
+    return best
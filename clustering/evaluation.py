@@ -0,0 +1,154 @@
+"""Evaluasi klaster (DBI, silhouette, CP*) dari profil unik dan tabel kontingensi label."""
+
+import numpy as np
+from scipy import sparse
+from sklearn.metrics import pairwise_distances
+
+from clustering.engine import categorical_profiles, compute_cp_star, factorize_columns
+from clustering.trace import traced
+
+MAX_EXACT_PROFILES = 2000
+
+
+def _contingency(label_index, inverse, n_clusters, n_profiles):
+    return np.bincount(
+        label_index * n_profiles + inverse, minlength=n_clusters * n_profiles
+    ).reshape(n_clusters, n_profiles).astype(float)
+
+
+def profile_contingency(encoded, labels):
+    """Profil unik, matriks jarak Hamming antar profil, dan tabel kontingensi klaster × profil."""
+    values = np.asarray(encoded, dtype=float)
+    first_index, counts, inverse = categorical_profiles(values)
+    cluster_ids, label_index = np.unique(labels, return_inverse=True)
+    contingency = _contingency(label_index.ravel(), inverse, len(cluster_ids), len(first_index))
+    dist = pairwise_distances(values[first_index], metric="hamming")
+    return dist, counts.astype(float), contingency
+
+
+def _dbi_ratio(spread, centroid_distances):
+    if np.allclose(spread, 0) or np.allclose(centroid_distances, 0):
+        return 0.0
+    centroid_distances[centroid_distances == 0] = np.inf
+    combined = spread[:, None] + spread[None, :]
+    return float(np.mean(np.max(combined / centroid_distances, axis=1)))
+
+
+@traced('dbi')
+def dbi_from_profiles(dist, counts, contingency):
+    """DBI persis seperti ``davies_bouldin_score(matriks_jarak_n×n, labels)``.
+
+    Baris i dari matriks jarak n×n hanya bergantung pada profilnya dan
+    konstan pada kolom-kolom berprofil sama, sehingga jarak Euklides antar
+    baris sama dengan jarak antar profil dengan bobot kolom √n_b.
+    """
+    features = dist * np.sqrt(counts)[None, :]
+    n_k = contingency.sum(axis=1)
+    centroids = contingency @ features / n_k[:, None]
+
+    spread = np.empty(len(n_k))
+    for c in range(len(n_k)):
+        distance_to_centroid = np.linalg.norm(features - centroids[c], axis=1)
+        spread[c] = contingency[c] @ distance_to_centroid / n_k[c]
+
+    return _dbi_ratio(spread, pairwise_distances(centroids))
+
+
+@traced('silhouette')
+def silhouette_from_profiles(dist, counts, contingency, sum_dist=None):
+    """Silhouette persis (jarak Hamming) dari tabel kontingensi, tanpa matriks n×n.
+
+    ``sum_dist`` (= ``contingency @ dist``) boleh diberikan langsung, mis. dari
+    ``indices_from_one_hot``; ``dist`` lalu tidak dipakai.
+    """
+    n_k = contingency.sum(axis=1)
+    if len(n_k) < 2:
+        return np.nan
+    # sum_dist[c, a] = jumlah jarak baris berprofil a ke anggota klaster c
+    if sum_dist is None:
+        sum_dist = contingency @ dist
+    total = 0.0
+    for c in range(len(n_k)):
+        present = contingency[c] > 0
+        if n_k[c] <= 1:
+            continue
+        a = sum_dist[c, present] / (n_k[c] - 1)
+        others = np.delete(np.arange(len(n_k)), c)
+        b = np.min(sum_dist[others][:, present] / n_k[others, None], axis=0)
+        s = np.nan_to_num((b - a) / np.maximum(a, b))
+        total += contingency[c, present] @ s
+    return float(total / counts.sum())
+
+
+def profile_one_hot(profile_codes):
+    """One-hot sparse (u × Σ V_d) dari kode kolom profil; jumlah kolom sama antar profil = O Oᵀ."""
+    n_profiles, n_cols = profile_codes.shape
+    codes = profile_codes.astype(np.int64)
+    offsets = np.concatenate([[0], np.cumsum(codes.max(axis=0) + 1)])
+    columns = (codes + offsets[:-1]).ravel()
+    return sparse.csr_matrix(
+        (np.ones(len(columns)), columns, np.arange(0, len(columns) + 1, n_cols)), shape=(n_profiles, offsets[-1])
+    )
+
+
+@traced('dbi_silhouette_one_hot')
+def indices_from_one_hot(one_hot, counts, contingency, block_size=4096):
+    """DBI dan silhouette persis (jarak Hamming) tanpa matriks jarak antar profil.
+
+    Dengan O = ``profile_one_hot`` dan D kolom, jarak d_ab = 1 − (O Oᵀ)_ab / D
+    linear dalam O, sehingga jumlah jarak klaster ke profil, centroid DBI
+    (rata-rata jarak × √n_b) dan jarak kuadrat profil ke centroid
+    Σ_b n_b (d_ab − μ_cb)² cukup dihitung dari perkalian dengan O dan momen
+    kedua Oᵀ diag(n) O. Biaya O(u · W²) untuk W kolom one-hot, bukan O(u²).
+    """
+    n_cols = one_hot[0].nnz
+    n_k = contingency.sum(axis=1)
+    # mean_dist[c, b] = rata-rata jarak anggota klaster c ke profil b
+    mean_dist = 1 - (one_hot @ (one_hot.T @ contingency.T)).T / (n_cols * n_k[:, None])
+    silhouette = silhouette_from_profiles(None, counts, contingency, sum_dist=mean_dist * n_k[:, None])
+
+    weighted_mean = mean_dist * counts[None, :]
+    centroid_norm = weighted_mean @ mean_dist.T
+    # Σ_b n_b d_ab μ_cb = Σ_b n_b μ_cb − (O (Oᵀ (n ⊙ μ_c)))_a / D
+    cross = weighted_mean.sum(axis=1)[None, :] - one_hot @ (one_hot.T @ weighted_mean.T) / n_cols
+    # Σ_b n_b d_ab² = Σ n − 2 (O Oᵀ n)_a / D + (O S Oᵀ)_aa / D², S = Oᵀ diag(n) O
+    first_moment = one_hot.T @ counts
+    second_moment = (one_hot.T @ sparse.diags(counts) @ one_hot).toarray()
+    feature_norm = np.empty(one_hot.shape[0])
+    for start in range(0, one_hot.shape[0], block_size):
+        block = one_hot[start:start + block_size]
+        quadratic = np.asarray(block.multiply(block @ second_moment).sum(axis=1)).ravel()
+        feature_norm[start:start + block_size] = (
+            counts.sum() - 2 * (block @ first_moment) / n_cols + quadratic / n_cols ** 2
+        )
+    sq_to_centroid = np.maximum(feature_norm[:, None] - 2 * cross + np.diag(centroid_norm)[None, :], 0.0)
+    spread = np.einsum('ca,ac->c', contingency, np.sqrt(sq_to_centroid)) / n_k
+    centroids = mean_dist * np.sqrt(counts)[None, :]
+    return _dbi_ratio(spread, pairwise_distances(centroids)), silhouette
+
+
+def evaluate_clustering(encoded, labels, max_exact_profiles=MAX_EXACT_PROFILES):
+    """DBI, silhouette, dan CP* untuk ``labels`` atas representasi kategorik ``encoded``.
+
+    Bila jumlah profil unik tidak melebihi ``max_exact_profiles`` DBI dan
+    silhouette dihitung dari matriks jarak antar profil; selain itu dari
+    one-hot profil (``indices_from_one_hot``) tanpa matriks u × u. Keduanya
+    persis, begitu pula CP* (O(n·D)).
+    """
+    labels = np.asarray(labels)
+    values = np.asarray(encoded, dtype=float)
+    first_index, counts, inverse = categorical_profiles(values)
+    metrics = {'cp_star': {'value': float(compute_cp_star(encoded, labels)), 'exact': True}}
+
+    if len(first_index) <= max_exact_profiles:
+        dist, counts, contingency = profile_contingency(encoded, labels)
+        dbi = dbi_from_profiles(dist, counts, contingency)
+        silhouette = silhouette_from_profiles(dist, counts, contingency)
+    else:
+        cluster_ids, label_index = np.unique(labels, return_inverse=True)
+        contingency = _contingency(label_index.ravel(), inverse, len(cluster_ids), len(first_index))
+        one_hot = profile_one_hot(factorize_columns(values[first_index]))
+        dbi, silhouette = indices_from_one_hot(one_hot, counts.astype(float), contingency)
+    metrics['dbi'] = {'value': dbi, 'exact': True}
+    metrics['silhouette'] = {'value': silhouette, 'exact': True}
+    return metrics
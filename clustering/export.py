@@ -0,0 +1,100 @@
+"""Ekspor hasil clustering per potongan ke CSV.gz/Parquet, opsional dalam bundel zip."""
+
+import gzip
+import io
+import json
+import tempfile
+import zipfile
+
+import joblib
+
+EXPORT_FORMATS = {
+    'csv.gz': ('CSV terkompresi (gzip)', 'application/gzip'),
+    'parquet': ('Parquet', 'application/vnd.apache.parquet'),
+    'csv': ('CSV', 'text/csv'),
+}
+CHUNK_ROWS = 100_000
+# Hasil ekspor di atas ukuran ini ditulis ke file sementara di disk, bukan ke memori
+SPOOL_MAX_BYTES = 16 * 1024 ** 2
+
+
+def _write_csv(df, binary, chunk_rows):
+    text = io.TextIOWrapper(binary, encoding='utf-8', newline='')
+    for start in range(0, max(len(df), 1), chunk_rows):
+        df.iloc[start:start + chunk_rows].to_csv(text, header=start == 0, index=False)
+    text.flush()
+    # Lepas wrapper tanpa menutup file biner di bawahnya
+    text.detach()
+
+
+def _write_parquet(df, binary, chunk_rows):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as e:
+        raise ImportError("Ekspor Parquet membutuhkan paket 'pyarrow'.") from e
+    schema = pa.Schema.from_pandas(df.iloc[:0], preserve_index=False)
+    with pq.ParquetWriter(binary, schema, compression='zstd') as writer:
+        for start in range(0, len(df), chunk_rows):
+            chunk = pa.Table.from_pandas(df.iloc[start:start + chunk_rows], schema=schema, preserve_index=False)
+            writer.write_table(chunk)
+
+
+def write_results(df, fileobj, fmt='csv.gz', chunk_rows=CHUNK_ROWS):
+    """Tulis ``df`` ke ``fileobj`` biner per ``chunk_rows`` baris tanpa membuat seluruh
+    teks/tabel di memori sekaligus."""
+    if fmt == 'csv.gz':
+        with gzip.GzipFile(fileobj=fileobj, mode='wb', compresslevel=6) as gz:
+            _write_csv(df, gz, chunk_rows)
+    elif fmt == 'csv':
+        _write_csv(df, fileobj, chunk_rows)
+    elif fmt == 'parquet':
+        _write_parquet(df, fileobj, chunk_rows)
+    else:
+        raise ValueError(f"Format ekspor tidak dikenal: {fmt}")
+
+
+def write_bundle(df, fileobj, metrics, fmt='parquet', model=None, chunk_rows=CHUNK_ROWS):
+    """Zip berisi hasil berlabel, ``parameter.json`` (parameter terbaik dan metrik per
+    tahap), dan opsional ``model.joblib`` untuk memberi label data baru."""
+    with zipfile.ZipFile(fileobj, 'w') as bundle:
+        # Hasil CSV.gz/Parquet sudah terkompresi; CSV biasa dikompresi oleh zip
+        info = zipfile.ZipInfo(f'hasil_clustering.{fmt}')
+        info.compress_type = zipfile.ZIP_DEFLATED if fmt == 'csv' else zipfile.ZIP_STORED
+        with bundle.open(info, 'w', force_zip64=True) as member:
+            write_results(df, member, fmt, chunk_rows)
+        bundle.writestr('parameter.json', json.dumps(metrics, indent=2, default=float),
+                        compress_type=zipfile.ZIP_DEFLATED)
+        if model is not None:
+            info = zipfile.ZipInfo('model.joblib')
+            info.compress_type = zipfile.ZIP_STORED
+            with bundle.open(info, 'w', force_zip64=True) as member:
+                joblib.dump(model, member, compress=3)
+
+
+def export_file(df, fmt='csv.gz', metrics=None, model=None, chunk_rows=CHUNK_ROWS):
+    """File sementara (sudah di-rewind) berisi hasil ekspor; bundel zip bila ``metrics``
+    atau ``model`` diberikan."""
+    out = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+    if metrics is None and model is None:
+        write_results(df, out, fmt, chunk_rows)
+    else:
+        write_bundle(df, out, metrics or {}, fmt, model, chunk_rows)
+    out.seek(0)
+    return out
+
+
+def format_from_path(path):
+    """Format ekspor menurut ekstensi file (default CSV biasa)."""
+    for fmt in EXPORT_FORMATS:
+        if str(path).lower().endswith('.' + fmt):
+            return fmt
+    return 'csv'
+
+
+def export_name(fmt, bundle=False, stem='hasil_clustering_ensemble'):
+    return f'{stem}.zip' if bundle else f'{stem}.{fmt}'
+
+
+def export_mime(fmt, bundle=False):
+    return 'application/zip' if bundle else EXPORT_FORMATS[fmt][1]
@@ -0,0 +1,69 @@
+"""Pembacaan data UMKM (CSV, Parquet, Arrow) dengan skema ringkas."""
+
+import os
+
+import pandas as pd
+
+from clustering.preprocessing import CAT_COLS, NUM_COLS
+
+SUPPORTED_TYPES = ['csv', 'parquet', 'arrow', 'feather']
+CSV_CHUNK_ROWS = 100_000
+
+
+def enforce_schema(df):
+    """Kolom numerik bilangan bulat memakai lebar integer terkecil; ``ojol``/``jenis``
+    dinormalisasi (strip, huruf kecil) lalu disimpan sebagai dtype category."""
+    for col in NUM_COLS:
+        if col not in df:
+            continue
+        values = pd.to_numeric(df[col])
+        if values.notna().all() and (values % 1 == 0).all():
+            values = pd.to_numeric(values.astype('int64'), downcast='integer')
+        df[col] = values
+    for col in CAT_COLS:
+        if col not in df:
+            continue
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            values = values.astype(object)
+        df[col] = values.where(values.isna(), values.astype(str).str.strip().str.lower()).astype('category')
+    return df
+
+
+def _read_csv(file, chunk_rows):
+    # Dibaca per potongan agar file besar tidak pernah dimuat sekaligus sebagai object/int64
+    chunks = [enforce_schema(chunk) for chunk in pd.read_csv(file, chunksize=chunk_rows)]
+    if not chunks:
+        # File unggahan sudah terbaca habis; kembali ke awal untuk mengambil header saja
+        if hasattr(file, 'seek'):
+            file.seek(0)
+        return enforce_schema(pd.read_csv(file))
+    # Kategori antar potongan bisa berbeda; samakan himpunannya agar concat tetap category
+    # (tanpa normalisasi ulang per baris)
+    for col in CAT_COLS:
+        if col not in chunks[0]:
+            continue
+        categories = chunks[0][col].cat.categories
+        for chunk in chunks[1:]:
+            categories = categories.union(chunk[col].cat.categories)
+        for chunk in chunks:
+            chunk[col] = chunk[col].cat.set_categories(categories)
+    return pd.concat(chunks, ignore_index=True)
+
+
+def read_umkm(file, name=None, chunk_rows=CSV_CHUNK_ROWS):
+    """Baca file unggahan/path menurut ekstensinya dan terapkan skema ringkas."""
+    name = name or getattr(file, 'name', None) or str(file)
+    ext = os.path.splitext(name)[1].lower().lstrip('.')
+    if ext in ('parquet', 'arrow', 'feather'):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError as e:
+            raise ImportError("Membaca file Parquet/Arrow membutuhkan paket 'pyarrow'.") from e
+        df = pd.read_parquet(file) if ext == 'parquet' else pd.read_feather(file)
+        return enforce_schema(df)
+    return _read_csv(file, chunk_rows)
+
+
+def memory_mb(df):
+    return df.memory_usage(deep=True).sum() / 1024 ** 2
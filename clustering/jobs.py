@@ -0,0 +1,184 @@
+"""Eksekusi tahap clustering di latar belakang dengan antrean dan batas job berat.
+
+Satu ``JobManager`` dipakai bersama oleh semua sesi. Job berat (grid ROCK,
+sweep AHC, t-SNE) dibatasi jumlah yang berjalan bersamaan; sisanya menunggu
+di antrean. Setiap sesi hanya boleh menjalankan beberapa job sekaligus
+sehingga satu unggahan besar tidak menghabiskan seluruh worker; job
+berikutnya menunggu di antrean. Pembatalan bersifat kooperatif: diperiksa
+setiap kali job melaporkan progres.
+"""
+
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = 'antre', 'berjalan', 'selesai', 'gagal', 'dibatalkan'
+
+
+class JobCancelled(Exception):
+    """Dilempar dari ``Job.report`` ketika job diminta berhenti."""
+
+
+class Job:
+    def __init__(self, job_id, stage, key, owner, heavy, tracer=None):
+        self.id = job_id
+        self.stage = stage
+        self.key = key
+        self.owner = owner
+        # Sesi yang menunggu hasil job ini (pemilik dan sesi lain dengan input yang sama)
+        self.sessions = {owner}
+        self.heavy = heavy
+        self.tracer = tracer
+        self.status = QUEUED
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def done(self):
+        return self.status in (DONE, FAILED, CANCELLED)
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def report(self, fraction):
+        """Callback progres (0–1) untuk fungsi grid; sekaligus titik pembatalan."""
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.progress = float(fraction)
+
+    def cancel(self):
+        self._cancel.set()
+
+
+class JobManager:
+    """Pool thread terbatas dengan antrean; paling banyak ``max_heavy`` job berat
+    berjalan bersamaan dan paling banyak ``max_jobs_per_owner`` job aktif per sesi."""
+
+    def __init__(self, max_workers=4, max_heavy=1, max_jobs_per_owner=2, max_finished=16):
+        self.max_jobs_per_owner = max_jobs_per_owner
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='clustering-job')
+        self._heavy = threading.BoundedSemaphore(max_heavy)
+        self._owner_slots = {}
+        self._lock = threading.Lock()
+        self._jobs = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, stage, func, key=None, owner=None, heavy=True, on_done=None, tracer=None):
+        """Antrekan ``func(job)``. Job dengan ``key`` yang sama (input dan parameter
+        identik) dipakai bersama, termasuk antar sesi, hingga dilupakan
+        (``forget``). Job gagal/dibatalkan hanya dikembalikan ke sesi yang
+        menunggunya agar tidak langsung diulang tanpa diminta; sesi lain
+        mendapat job baru.
+
+        ``on_done(result)`` dipanggil di thread worker setelah job selesai sukses,
+        misalnya untuk menyimpan hasil ke cache tahap. ``tracer`` (opsional)
+        aktif selama job berjalan di thread worker.
+        """
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key != key:
+                        continue
+                    if job.status not in (FAILED, CANCELLED):
+                        job.sessions.add(owner)
+                        return job
+                    if owner in job.sessions:
+                        return job
+            job = Job(next(self._ids), stage, key, owner, heavy, tracer)
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, func, on_done)
+        return job
+
+    def _owner_slot(self, owner):
+        with self._lock:
+            if owner not in self._owner_slots:
+                self._owner_slots[owner] = threading.BoundedSemaphore(self.max_jobs_per_owner)
+            return self._owner_slots[owner]
+
+    @staticmethod
+    def _wait_for(semaphore, job):
+        # Tunggu giliran sambil tetap bisa dibatalkan dari antrean
+        while not semaphore.acquire(timeout=0.2):
+            if job.cancel_requested:
+                return False
+        return True
+
+    def _run(self, job, func, on_done):
+        held = []
+        try:
+            for semaphore in [self._owner_slot(job.owner)] + ([self._heavy] if job.heavy else []):
+                if not self._wait_for(semaphore, job):
+                    self._finish(job, CANCELLED)
+                    return
+                held.append(semaphore)
+            if job.cancel_requested:
+                self._finish(job, CANCELLED)
+                return
+            job.status = RUNNING
+            job.started = time.time()
+            with job.tracer.activate() if job.tracer is not None else nullcontext():
+                job.result = func(job)
+            # Pembatalan yang datang setelah titik progres terakhir tetap dihormati
+            if job.cancel_requested:
+                raise JobCancelled()
+            if on_done is not None:
+                on_done(job.result)
+            job.progress = 1.0
+            self._finish(job, DONE)
+        except JobCancelled:
+            job.result = None
+            self._finish(job, CANCELLED)
+        except Exception as e:
+            job.error = e
+            self._finish(job, FAILED)
+        finally:
+            for semaphore in reversed(held):
+                semaphore.release()
+
+    def _finish(self, job, status):
+        job.finished = time.time()
+        job.status = status
+
+    def _prune(self):
+        # Job selesai tertua dilupakan agar hasilnya tidak ditahan selamanya
+        finished = [job for job in self._jobs.values() if job.done]
+        for job in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job.id]
+        busy = {job.owner for job in self._jobs.values() if not job.done}
+        for owner in set(self._owner_slots) - busy:
+            del self._owner_slots[owner]
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def can_cancel(self, job, owner):
+        """Hanya pemilik yang boleh membatalkan, dan hanya bila tidak ada sesi lain yang menunggu."""
+        with self._lock:
+            return job.owner == owner and job.sessions <= {owner}
+
+    def cancel(self, job_id, owner):
+        """Minta job berhenti; mengembalikan ``False`` bila ``owner`` tidak berhak."""
+        job = self.get(job_id)
+        if job is None or not self.can_cancel(job, owner):
+            return False
+        job.cancel()
+        return True
+
+    def forget(self, job_id):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def jobs(self, owner=None):
+        with self._lock:
+            return [job for job in self._jobs.values() if owner is None or job.owner == owner]
@@ -0,0 +1,135 @@
+"""Model hasil fit untuk memberi label UMKM baru tanpa menjalankan ulang seluruh pipeline."""
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.preprocessing import StandardScaler
+
+from clustering.config import ENSEMBLE_COLS
+from clustering.engine import rock_label_scores
+from clustering.preprocessing import CAT_COLS, NUM_COLS, Preprocessor
+
+# Batas drift default: di atas nilai ini sebaiknya dilakukan fit ulang penuh.
+# di_luar_batas_clip adalah kenaikan porsi baris di luar batas clip terhadap porsi saat fit.
+DRIFT_THRESHOLDS = {
+    'di_luar_batas_clip': 0.15,
+    'jauh_dari_centroid': 0.20,
+    'profil_kategori_baru': 0.05,
+    'kombinasi_ensemble_baru': 0.05,
+    'pergeseran_rata_rata': 0.50,
+}
+
+
+class RockLabeler:
+    """Tahap pelabelan ROCK: profil kategori dan jumlah anggotanya per klaster.
+
+    Profil yang sudah dikenal mendapat klaster mayoritasnya. Profil baru
+    diberi klaster dengan skor N_c / (n_c + 1)^f(θ) tertinggi, dengan N_c
+    jumlah tetangga (similarity ≥ θ) di klaster c dan f(θ) = (1 - θ) / (1 + θ).
+    """
+
+    def __init__(self, values, labels, theta):
+        values = np.asarray(values).astype(str)
+        self.theta = theta
+        self.profiles, inverse = np.unique(values, axis=0, return_inverse=True)
+        self.clusters, label_index = np.unique(labels, return_inverse=True)
+        n_profiles = len(self.profiles)
+        self.counts = np.bincount(
+            label_index.ravel() * n_profiles + inverse.ravel(), minlength=len(self.clusters) * n_profiles
+        ).reshape(len(self.clusters), n_profiles).T
+        self.cluster_sizes = self.counts.sum(axis=0)
+
+    def predict(self, values):
+        """Kembalikan (label, profil dikenal?, punya tetangga?) untuk setiap baris."""
+        values = np.asarray(values).astype(str)
+        new_profiles, inverse = np.unique(values, axis=0, return_inverse=True)
+
+        similarity = np.mean(new_profiles[:, None, :] == self.profiles[None, :, :], axis=2)
+        known = similarity.max(axis=1) == 1
+        neighbor_counts = (similarity >= self.theta).astype(float) @ self.counts
+        scores = rock_label_scores(neighbor_counts, self.cluster_sizes, self.theta)
+
+        exact_match = np.argmax(similarity, axis=1)
+        chosen = np.where(known, np.argmax(self.counts[exact_match], axis=1), np.argmax(scores, axis=1))
+        has_neighbors = neighbor_counts.sum(axis=1) > 0
+        inverse = inverse.ravel()
+        return self.clusters[chosen][inverse], known[inverse], has_neighbors[inverse]
+
+
+class ClusteringModel:
+    """Parameter yang dibutuhkan untuk memberi ``cluster_numerik``, ``cluster_kategorik``,
+    dan ``cluster_ensemble_rock`` pada data baru: batas clip IQR, parameter z-score,
+    centroid numerik, profil tetangga ROCK per klaster, dan pemetaan ensemble."""
+
+    def __init__(self, df_raw, df_result, categorical_theta, ensemble_theta):
+        self.preprocessor = Preprocessor(NUM_COLS).fit(df_raw)
+        # Batas IQR memotong sebagian data fit sendiri; drift diukur relatif terhadap porsi ini
+        self.clip_rate = self._outside_clip(df_raw).mean()
+        df_raw, df_zscore = self.preprocessor.transform(df_raw)
+        self.scaler = StandardScaler().fit(df_zscore[NUM_COLS].to_numpy())
+
+        X_scaled = self.scaler.transform(df_zscore[NUM_COLS].to_numpy())
+        numeric_labels = df_result['cluster_numerik'].to_numpy()
+        self.numeric_clusters = np.unique(numeric_labels)
+        self.centroids = np.stack([X_scaled[numeric_labels == cl].mean(axis=0) for cl in self.numeric_clusters])
+        distance = np.linalg.norm(X_scaled - self.centroids[np.searchsorted(self.numeric_clusters, numeric_labels)], axis=1)
+        self.centroid_p95 = np.array([
+            np.percentile(distance[numeric_labels == cl], 95) for cl in self.numeric_clusters
+        ])
+
+        self.categorical = RockLabeler(df_raw[CAT_COLS], df_result['cluster_kategorik'], categorical_theta)
+        self.ensemble = RockLabeler(df_result[ENSEMBLE_COLS], df_result['cluster_ensemble_rock'], ensemble_theta)
+        self.n_train = len(df_raw)
+
+    @classmethod
+    def from_pipeline(cls, df_raw, result):
+        """Bangun model dari data mentah dan keluaran ``run_pipeline``."""
+        metrics = result['metrics']
+        return cls(df_raw, result['df'], metrics['kategorik']['theta'], metrics['ensemble']['theta'])
+
+    def _assign(self, df_new):
+        df_new, df_zscore = self.preprocessor.transform(df_new)
+        X_scaled = self.scaler.transform(df_zscore[NUM_COLS].to_numpy())
+        distance = np.linalg.norm(X_scaled[:, None, :] - self.centroids[None, :, :], axis=2)
+        nearest = np.argmin(distance, axis=1)
+
+        out = pd.DataFrame(index=df_new.index)
+        out['cluster_numerik'] = self.numeric_clusters[nearest]
+        out['cluster_kategorik'], known_profile, _ = self.categorical.predict(df_new[CAT_COLS])
+        out['cluster_ensemble_rock'], known_combo, _ = self.ensemble.predict(out[ENSEMBLE_COLS])
+        details = {
+            'X_scaled': X_scaled,
+            'centroid_distance': distance[np.arange(len(nearest)), nearest], 'nearest': nearest,
+            'known_profile': known_profile, 'known_combo': known_combo,
+        }
+        return out, details
+
+    def predict(self, df_new):
+        """Label ketiga tahap untuk batch data baru (kolom asli + kolom klaster)."""
+        labels, _ = self._assign(df_new)
+        return df_new.join(labels)
+
+    def _outside_clip(self, df):
+        raw = df[NUM_COLS].to_numpy(dtype=float)
+        return ((raw < self.preprocessor.lower) | (raw > self.preprocessor.upper)).any(axis=1)
+
+    def drift_report(self, df_new, thresholds=DRIFT_THRESHOLDS):
+        """Ukuran pergeseran data baru terhadap data fit dan apakah fit ulang diperlukan."""
+        _, details = self._assign(df_new)
+
+        report = {
+            'di_luar_batas_clip': float(self._outside_clip(df_new).mean() - self.clip_rate),
+            'jauh_dari_centroid': float(np.mean(details['centroid_distance'] > self.centroid_p95[details['nearest']])),
+            'profil_kategori_baru': float(1 - details['known_profile'].mean()),
+            'kombinasi_ensemble_baru': float(1 - details['known_combo'].mean()),
+            'pergeseran_rata_rata': float(np.max(np.abs(details['X_scaled'].mean(axis=0)))),
+        }
+        reasons = [name for name, value in report.items() if value > thresholds[name]]
+        return {'metrik': report, 'perlu_fit_ulang': bool(reasons), 'alasan': reasons, 'n_baru': len(df_new)}
+
+    def save(self, path):
+        joblib.dump(self, path, compress=3)
+
+    @staticmethod
+    def load(path):
+        return joblib.load(path)
@@ -0,0 +1,29 @@
+"""Eksekusi paralel kandidat grid search (theta × k, linkage × k)."""
+
+import os
+
+from joblib import Parallel, delayed
+
+
+def effective_n_jobs(n_jobs):
+    """Normalisasi jumlah worker: None/1 = serial, -1 = semua core."""
+    if n_jobs is None:
+        return 1
+    if n_jobs < 0:
+        return max(os.cpu_count() + 1 + n_jobs, 1)
+    return max(int(n_jobs), 1)
+
+
+def run_tasks(func, tasks, n_jobs=1, backend="loky"):
+    """Jalankan ``func(*args)`` untuk setiap args di ``tasks``, hasil berurutan sesuai input.
+
+    Dengan ``backend="loky"`` (proses) array numpy besar di-memmap sekali
+    dan dibagikan ke worker, tidak disalin per tugas; ``"threading"``
+    berbagi memori langsung. Urutan hasil selalu sama dengan urutan tugas,
+    sehingga pemilihan kandidat terbaik tetap deterministik.
+    """
+    n_jobs = effective_n_jobs(n_jobs)
+    if n_jobs == 1 or len(tasks) <= 1:
+        return (func(*args) for args in tasks)
+    parallel = Parallel(n_jobs=min(n_jobs, len(tasks)), backend=backend, return_as="generator", max_nbytes="1M")
+    return parallel(delayed(func)(*args) for args in tasks)
@@ -0,0 +1,130 @@
+"""Pipeline lengkap preprocessing → AHC → ROCK → ensemble tanpa Streamlit."""
+
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+from sklearn.metrics import adjusted_rand_score
+from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+from clustering.config import (
+    CATEGORICAL_THETAS, ENSEMBLE_COLS, ENSEMBLE_THETAS, LINKAGE_TYPES, NUMERIC_K_RANGE, NUMERIC_LARGE_N_THRESHOLD,
+    NUMERIC_MICRO_CLUSTERS, ROCK_K_RANGE
+)
+from clustering.engine import ahc_grid_search, rock_grid_search
+from clustering.evaluation import evaluate_clustering
+from clustering.preprocessing import CAT_COLS, NUM_COLS, preprocess
+from clustering.trace import span
+
+
+@contextmanager
+def timed(stage, timings):
+    """Catat waktu ``stage`` ke ``timings`` dan, bila ada tracer aktif, sebagai span."""
+    start = time.perf_counter()
+    try:
+        with span(stage):
+            yield
+    finally:
+        timings[stage] = time.perf_counter() - start
+
+
+def run_numeric(df_zscore, n_jobs=1, large_n_threshold=NUMERIC_LARGE_N_THRESHOLD):
+    X_scaled = StandardScaler().fit_transform(df_zscore[NUM_COLS])
+    return ahc_grid_search(
+        X_scaled, LINKAGE_TYPES, NUMERIC_K_RANGE, n_jobs=n_jobs,
+        large_n_threshold=large_n_threshold, n_micro=NUMERIC_MICRO_CLUSTERS
+    )
+
+
+def run_categorical(df, compress=False, n_jobs=1, sample_size=None, method='average'):
+    return rock_grid_search(
+        df[CAT_COLS], CATEGORICAL_THETAS, ROCK_K_RANGE, compress=compress, n_jobs=n_jobs, sample_size=sample_size,
+        method=method
+    )
+
+
+def ensemble_input(df):
+    df_ensemble_input = df[ENSEMBLE_COLS].astype(str)
+    encoded_ensemble = OneHotEncoder(sparse_output=False).fit_transform(df_ensemble_input)
+    return df_ensemble_input, encoded_ensemble
+
+
+def run_ensemble(df, compress=False, progress=None, n_jobs=1, sample_size=None, method='average'):
+    df_ensemble_input, encoded_ensemble = ensemble_input(df)
+    return rock_grid_search(
+        df_ensemble_input, ENSEMBLE_THETAS, ROCK_K_RANGE,
+        cp_encoded=pd.DataFrame(encoded_ensemble), progress=progress, compress=compress, n_jobs=n_jobs,
+        sample_size=sample_size, method=method
+    )
+
+
+def evaluate_ensemble(df):
+    """DBI, silhouette, dan CP* hasil ensemble atas one-hot input ensemble (jarak Hamming)."""
+    _, encoded_ensemble = ensemble_input(df)
+    return evaluate_clustering(encoded_ensemble, df['cluster_ensemble_rock'].values)
+
+
+def numeric_metrics(numeric):
+    """Parameter terbaik dan metrik hasil ``ahc_grid_search`` dalam bentuk siap JSON."""
+    return {
+        'linkage': numeric['link'], 'k': int(numeric['k']),
+        'pseudo_f': float(numeric['PseudoF']), 'icd': float(numeric['ICD']),
+        'micro_cluster': bool(numeric['summarized']),
+    }
+
+
+def rock_metrics(grid):
+    """Parameter terbaik dan CP* hasil ``rock_grid_search`` dalam bentuk siap JSON."""
+    metrics = {'theta': grid['theta'], 'k': int(grid['k']), 'cp_star': float(grid['CP']), 'metode': grid['method']}
+    if 'sample_index' in grid:
+        metrics['sampel'] = len(grid['sample_index'])
+        metrics['cp_star_sampel'] = float(grid['CP_sampel'])
+    return metrics
+
+
+def sampling_agreement(sampled, full):
+    """Kecocokan label mode sampel dengan run penuh atas data yang sama (ARI, 1 = identik)."""
+    return {
+        'ari': float(adjusted_rand_score(full['labels'], sampled['labels'])),
+        'parameter_sama': (sampled['theta'], sampled['k']) == (full['theta'], full['k']),
+    }
+
+
+def run_pipeline(df, compress=False, evaluate=True, n_jobs=1, large_n_threshold=NUMERIC_LARGE_N_THRESHOLD,
+                 rock_sample_size=None, rock_method='average'):
+    """Jalankan semua tahap dan kembalikan data berlabel, metrik, serta waktu per tahap.
+
+    ``n_jobs`` adalah jumlah worker untuk grid search (-1 = semua core).
+    Di atas ``large_n_threshold`` baris, AHC berjalan atas micro-cluster.
+    ``rock_sample_size`` mengaktifkan mode sampel ROCK pada tahap kategorik dan ensemble;
+    ``rock_method`` memilih penggabungan ROCK (``'average'`` atau ``'goodness'``).
+    ``compress=True`` menjalankan ROCK atas profil unik (aproksimasi, lihat ``rock_grid_search``).
+    """
+    timings = {}
+    with timed('preprocessing', timings):
+        df_clean, df_zscore = preprocess(df, NUM_COLS)
+
+    with timed('numerik', timings):
+        numeric = run_numeric(df_zscore, n_jobs, large_n_threshold)
+    df_clean['cluster_numerik'] = numeric['labels']
+
+    with timed('kategorik', timings):
+        categorical = run_categorical(df_clean, compress, n_jobs, rock_sample_size, rock_method)
+    df_clean['cluster_kategorik'] = categorical['labels']
+
+    with timed('ensemble', timings):
+        ensemble = run_ensemble(df_clean, compress, n_jobs=n_jobs, sample_size=rock_sample_size, method=rock_method)
+    df_clean['cluster_ensemble_rock'] = ensemble['labels']
+
+    metrics = {
+        'numerik': numeric_metrics(numeric),
+        'kategorik': rock_metrics(categorical),
+        'ensemble': rock_metrics(ensemble),
+    }
+    if evaluate:
+        with timed('evaluasi', timings):
+            evaluation = evaluate_ensemble(df_clean)
+        metrics['ensemble']['dbi'] = evaluation['dbi']['value']
+        metrics['ensemble']['silhouette'] = evaluation['silhouette']['value']
+
+    return {'df': df_clean, 'metrics': metrics, 'timings': timings}
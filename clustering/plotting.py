@@ -0,0 +1,77 @@
+"""Rendering plot klaster dengan level-of-detail untuk data besar."""
+
+import io
+
+import matplotlib.pyplot as plt
+import numpy as np
+from scipy.cluster.hierarchy import dendrogram
+
+DENDROGRAM_P = 30
+SCATTER_MAX_POINTS = 5000
+HEXBIN_THRESHOLD = 50000
+
+
+def figure_png(fig, dpi=100):
+    """Render figure ke PNG lalu tutup, agar bisa di-cache dan dipakai ulang."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def dendrogram_figure(linked, title, xlabel, p=DENDROGRAM_P):
+    """Dendrogram; jika daun lebih dari ``p``, hanya ``p`` gabungan teratas yang digambar
+    dan setiap daun menampilkan jumlah anggotanya."""
+    fig = plt.figure(figsize=(10, 6))
+    if len(linked) + 1 > p:
+        dendrogram(linked, orientation='top', distance_sort='descending',
+                   truncate_mode='lastp', p=p, show_leaf_counts=True)
+        xlabel = f"{xlabel} (jumlah anggota per cabang, {p} cabang teratas)"
+    else:
+        dendrogram(linked, orientation='top', distance_sort='descending', show_leaf_counts=False)
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel("Jarak (distance)")
+    return fig
+
+
+def downsample_per_cluster(labels, max_points, random_state=42):
+    """Indeks sampel dengan proporsi tiap klaster dipertahankan."""
+    rng = np.random.default_rng(random_state)
+    labels = np.asarray(labels)
+    keep = []
+    for cl in np.unique(labels):
+        members = np.flatnonzero(labels == cl)
+        take = max(1, int(round(len(members) * max_points / len(labels))))
+        keep.append(rng.choice(members, size=min(take, len(members)), replace=False))
+    return np.sort(np.concatenate(keep))
+
+
+def cluster_scatter_figure(X_2d, labels, title, axis_name, label_offset=0,
+                           max_points=SCATTER_MAX_POINTS, hexbin_threshold=HEXBIN_THRESHOLD):
+    """Scatter per klaster. Di atas ``max_points`` titik digambar sampel per klaster;
+    di atas ``hexbin_threshold`` kepadatan semua titik ditampilkan sebagai hexbin
+    di belakang sampel tersebut."""
+    labels = np.asarray(labels)
+    n = len(labels)
+    fig = plt.figure(figsize=(8, 6))
+
+    if n > hexbin_threshold:
+        plt.hexbin(X_2d[:, 0], X_2d[:, 1], gridsize=80, bins='log', cmap='Greys', mincnt=1)
+    if n > max_points:
+        shown = downsample_per_cluster(labels, max_points)
+        title = f"{title}\n({len(shown):,} dari {n:,} titik ditampilkan)"
+        marker_size = 6
+    else:
+        shown = np.arange(n)
+        marker_size = None
+
+    for cl in np.unique(labels):
+        idx = shown[labels[shown] == cl]
+        plt.scatter(X_2d[idx, 0], X_2d[idx, 1], s=marker_size, label=f'Cluster {cl + label_offset}')
+    plt.title(title)
+    plt.xlabel(f"{axis_name} 1")
+    plt.ylabel(f"{axis_name} 2")
+    plt.legend()
+    plt.grid(True)
+    return fig
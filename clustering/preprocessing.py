@@ -0,0 +1,81 @@
+"""Tahap preprocessing: normalisasi kategori, penanganan outlier IQR, dan z-score."""
+
+import numpy as np
+import pandas as pd
+
+CAT_COLS = ['ojol', 'jenis']
+NUM_COLS = ['omset', 'tenaga kerja', 'modal']
+
+
+def _normalize(values):
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        # Cukup normalisasi daftar kategori, bukan setiap baris
+        categories = values.cat.categories.str.strip().str.lower()
+        if categories.is_unique:
+            return values.cat.rename_categories(categories)
+        values = values.astype(object)
+    return values.str.strip().str.lower()
+
+
+def normalize_categories(df):
+    df['jenis'] = _normalize(df['jenis'])
+    df['ojol'] = _normalize(df['ojol'])
+    return df
+
+
+class Preprocessor:
+    """Batas clip IQR (Q1 - 1.5·IQR, Q3 + 1.5·IQR) dan parameter z-score yang di-fit sekali.
+
+    ``transform`` tidak mengubah DataFrame input dan idempoten: menerapkannya pada
+    data yang sudah diproses menghasilkan data yang sama, sehingga fit yang sama
+    dapat dipakai untuk batch data baru.
+    """
+
+    def __init__(self, cols_num=NUM_COLS):
+        self.cols_num = list(cols_num)
+
+    def fit(self, df):
+        values = df[self.cols_num].to_numpy(dtype=float)
+        q1, q3 = np.nanquantile(values, [0.25, 0.75], axis=0)
+        iqr = q3 - q1
+        self.lower = q1 - 1.5 * iqr
+        self.upper = q3 + 1.5 * iqr
+        clipped = self.clip(df)
+        self.mean = clipped.mean(axis=0)
+        self.std = clipped.std(axis=0)
+        return self
+
+    @property
+    def bounds(self):
+        return {col: (lo, up) for col, lo, up in zip(self.cols_num, self.lower, self.upper)}
+
+    def clip(self, df):
+        """Array kolom numerik setelah clip ke batas hasil fit."""
+        return np.clip(df[self.cols_num].to_numpy(dtype=float), self.lower, self.upper)
+
+    def zscore(self, clipped):
+        return (clipped - self.mean) / self.std
+
+    def transform(self, df):
+        """Kembalikan (data bersih dengan outlier di-clip, data ter-normalisasi z-score)."""
+        # Salinan dangkal: kolom yang diganti tidak menyentuh data asli (copy-on-write)
+        df_clean = normalize_categories(df.copy(deep=False))
+        clipped = self.clip(df_clean)
+        for j, col in enumerate(self.cols_num):
+            values = clipped[:, j]
+            # Kolom bilangan bulat tetap bertipe integer selama clip tidak menghasilkan pecahan
+            if df_clean[col].dtype.kind in 'iu' and (values % 1 == 0).all():
+                values = values.astype(df_clean[col].dtype)
+            df_clean[col] = values
+
+        df_zscore = df_clean.copy(deep=False)
+        df_zscore[self.cols_num] = self.zscore(clipped)
+        return df_clean, df_zscore
+
+    def fit_transform(self, df):
+        return self.fit(df).transform(df)
+
+
+def preprocess(df, cols_num=NUM_COLS):
+    """Kembalikan (data bersih dengan outlier di-clip, data ter-normalisasi z-score)."""
+    return Preprocessor(cols_num).fit_transform(df)
@@ -0,0 +1,146 @@
+"""Instrumentasi ringan: waktu wall, waktu CPU, dan alokasi puncak per tahap.
+
+Kode pipeline menandai bagian penting dengan ``span(nama)``; tanpa tracer
+aktif ``span`` tidak melakukan apa pun. Tracer hanya aktif di thread/konteks
+yang memanggil ``Tracer.start`` sehingga sesi Streamlit lain tidak ikut
+terekam. Pekerjaan di worker ``run_tasks`` (``n_jobs`` > 1) berjalan di
+proses lain dan hanya terlihat sebagai span induknya.
+
+tracemalloc (dan ``reset_peak``) bersifat global per proses, jadi hanya satu
+tracer yang mengukur memori pada satu waktu; tracer ``memory=True`` lain
+yang dimulai saat itu berjalan tanpa ukuran memori (``memory`` menjadi
+``False``, ``memory_requested`` tetap ``True``).
+"""
+
+import functools
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+_current = ContextVar('clustering_tracer', default=None)
+
+# Puncak tracemalloc dipakai bersama seluruh proses; pemiliknya hanya satu tracer
+_tracemalloc_lock = threading.Lock()
+_memory_tracer = None
+
+
+def _acquire_tracemalloc(tracer):
+    global _memory_tracer
+    with _tracemalloc_lock:
+        if _memory_tracer is not None:
+            return False
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _memory_tracer = tracer
+        return True
+
+
+def _release_tracemalloc(tracer):
+    global _memory_tracer
+    with _tracemalloc_lock:
+        if _memory_tracer is tracer:
+            _memory_tracer = None
+            tracemalloc.stop()
+
+
+class Tracer:
+    """Kumpulan span bertingkat. ``memory=True`` mengukur alokasi puncak lewat
+    tracemalloc (menambah overhead pada kode Python murni) bila tidak ada
+    tracer lain yang sedang mengukur memori."""
+
+    def __init__(self, memory=False):
+        self.memory_requested = memory
+        self.memory = memory
+        self.spans = []
+        self._stack = []
+        self._token = None
+
+    def start(self):
+        if self._token is None:
+            self._token = _current.set(self)
+            self.memory = self.memory_requested and _acquire_tracemalloc(self)
+        return self
+
+    def stop(self):
+        if self._token is not None:
+            _current.reset(self._token)
+            self._token = None
+            if self.memory:
+                _release_tracemalloc(self)
+        return self
+
+    @contextmanager
+    def activate(self):
+        self.start()
+        try:
+            yield self
+        finally:
+            self.stop()
+
+    @contextmanager
+    def span(self, name, **attrs):
+        record = {'name': name, 'depth': len(self._stack),
+                  'parent': self._stack[-1]['index'] if self._stack else None, **attrs}
+        frame = {'index': len(self.spans), 'start_mem': 0, 'peak': 0}
+        self.spans.append(record)
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._stack:
+                self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+            tracemalloc.reset_peak()
+            frame['start_mem'] = frame['peak'] = current
+        self._stack.append(frame)
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record['wall_s'] = time.perf_counter() - wall
+            record['cpu_s'] = time.process_time() - cpu
+            self._stack.pop()
+            if self.memory:
+                peak = max(frame['peak'], tracemalloc.get_traced_memory()[1])
+                record['peak_mb'] = (peak - frame['start_mem']) / 1024 ** 2
+                if self._stack:
+                    self._stack[-1]['peak'] = max(self._stack[-1]['peak'], peak)
+
+    def summary(self):
+        """Total per nama span: jumlah panggilan, wall, CPU, dan alokasi puncak terbesar."""
+        totals = {}
+        for record in self.spans:
+            if 'wall_s' not in record:
+                continue
+            row = totals.setdefault(record['name'], {'span': record['name'], 'jumlah': 0, 'wall_s': 0.0, 'cpu_s': 0.0})
+            row['jumlah'] += 1
+            row['wall_s'] += record['wall_s']
+            row['cpu_s'] += record['cpu_s']
+            if 'peak_mb' in record:
+                row['peak_mb'] = max(row.get('peak_mb', 0.0), record['peak_mb'])
+        return sorted(totals.values(), key=lambda row: row['wall_s'], reverse=True)
+
+    def to_dict(self):
+        return {'memory': self.memory, 'memory_requested': self.memory_requested, 'spans': self.spans,
+                'ringkasan': self.summary()}
+
+
+@contextmanager
+def span(name, **attrs):
+    """Span pada tracer yang sedang aktif; no-op bila tidak ada."""
+    tracer = _current.get()
+    if tracer is None:
+        yield None
+        return
+    with tracer.span(name, **attrs) as record:
+        yield record
+
+
+def traced(name):
+    """Dekorator: seluruh pemanggilan fungsi menjadi satu span."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
@@ -1,18 +1,23 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import numpy as np
-import io
-
-from scipy.stats import zscore
-from sklearn.cluster import AgglomerativeClustering
-from sklearn.preprocessing import StandardScaler, LabelEncoder  # ⬅️ Tambahkan LabelEncoder di sini
-from sklearn.metrics import pairwise_distances
-from scipy.spatial.distance import squareform
-from scipy.cluster.hierarchy import linkage, fcluster
-from itertools import combinations
-from sklearn.manifold import TSNE  # ⬅️ Diperlukan untuk t-SNE di ROCK
+import json
+import os
+
+# Hanya modul ringan di sini; matplotlib/seaborn/scipy/scikit-learn dimuat oleh
+# halaman yang memakainya agar Home dan Upload tampil tanpa menunggu impor berat.
+from clustering.cache import StageCache
+from clustering.config import (
+    CATEGORICAL_THETAS, EMBEDDING_MODES, ENSEMBLE_THETAS, LINKAGE_TYPES, NUMERIC_K_RANGE,
+    NUMERIC_LARGE_N_THRESHOLD, NUMERIC_MICRO_CLUSTERS, ROCK_AGREEMENT_MAX_ROWS, ROCK_K_RANGE, ROCK_METHODS,
+    ROCK_SAMPLE_SIZE
+)
+from clustering.ingest import SUPPORTED_TYPES, memory_mb, read_umkm
+from clustering.export import EXPORT_FORMATS, export_file, export_mime, export_name
+from clustering.preprocessing import NUM_COLS
+from clustering.jobs import CANCELLED, DONE, FAILED, JobManager
+from clustering.trace import Tracer
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 
 # Konfigurasi halaman
 st.set_page_config(page_title="Clustering UMKM", layout="wide")
@@ -31,569 +36,734 @@ menu = st.sidebar.radio("Pilih halaman:", [
     "💾 Unduh Hasil Clustering Ensemble"
 ])
 
+
+# Cache hasil tiap tahap, dipakai bersama antar rerun dan antar sesi
+@st.cache_resource
+def get_stage_cache():
+    return StageCache(max_bytes=512 * 1024 ** 2, max_entries=64)
+
+
+stage_cache = get_stage_cache()
+
+
+# Worker latar belakang bersama; tahap berat dibatasi agar sesi lain tetap mendapat giliran
+@st.cache_resource
+def get_job_manager():
+    return JobManager(max_workers=4, max_heavy=max(1, (os.cpu_count() or 2) // 2), max_jobs_per_owner=2)
+
+
+job_manager = get_job_manager()
+
+# Jumlah worker untuk grid search (tidak memengaruhi hasil, hanya kecepatan)
+n_jobs = st.sidebar.number_input(
+    "Worker paralel grid search", min_value=1, max_value=os.cpu_count() or 1, value=1,
+    help="Kandidat theta/linkage dibagi ke beberapa proses. Hasil terbaik tetap sama dengan eksekusi serial."
+)
+
+# Cara penggabungan klaster ROCK pada halaman kategorik dan ensemble
+rock_method = st.sidebar.selectbox(
+    "Metode penggabungan ROCK", list(ROCK_METHODS), format_func=lambda m: ROCK_METHODS[m],
+    help="Goodness ROCK menggabungkan pasangan dengan link ternormalisasi tertinggi memakai heap atas link "
+         "sparse; memori sebanding jumlah pasangan ber-link, bukan n²."
+)
+
+# Di atas ambang ini AHC berjalan atas micro-cluster agar tidak O(n²)
+large_n_threshold = st.sidebar.number_input(
+    "Ambang mode data besar AHC (baris)", min_value=1000, value=NUMERIC_LARGE_N_THRESHOLD, step=1000,
+    help=f"Jika jumlah data melebihi ambang ini, data numerik diringkas menjadi "
+         f"{NUMERIC_MICRO_CLUSTERS} micro-cluster sebelum AHC."
+)
+
+# Mode embedding 2-D untuk scatter plot klaster
+embed_mode = st.sidebar.selectbox(
+    "Mode visualisasi 2-D", list(EMBEDDING_MODES), format_func=lambda m: EMBEDDING_MODES[m][0]
+)
+embed_sample_size = st.sidebar.slider(
+    "Ukuran sampel t-SNE cepat", min_value=500, max_value=10000, value=2000, step=500,
+    disabled=embed_mode != 'sampel'
+)
+embed_axis = EMBEDDING_MODES[embed_mode][1]
+
+# Jejak waktu wall/CPU (dan memori puncak bila diminta) per tahap dan iterasi grid pada rerun ini
+trace_panel = st.sidebar.expander("⏱️ Instrumentasi", expanded=False)
+trace_memory = trace_panel.checkbox(
+    "Ukur memori puncak", value=False,
+    help="Memakai tracemalloc; menambah overhead terutama pada tahap yang banyak memakai kode Python."
+)
+tracer = Tracer(memory=trace_memory).start()
+
+
+def session_owner():
+    ctx = get_script_run_ctx()
+    return ctx.session_id if ctx is not None else None
+
+
+@st.fragment(run_every=1.0)
+def job_progress(job_id, label):
+    # Hanya fragmen ini yang diperbarui tiap detik; halaman dijalankan ulang saat job selesai
+    job = job_manager.get(job_id)
+    if job is None or job.done:
+        st.rerun()
+    text = f"{label}: menunggu giliran worker…" if job.status != 'berjalan' else f"{label}: {job.progress:.0%}"
+    st.progress(job.progress, text=text)
+    owner = session_owner()
+    if job.cancel_requested:
+        st.caption("Membatalkan…")
+    elif not job_manager.can_cancel(job, owner):
+        st.caption("Job ini juga ditunggu sesi lain, jadi tidak dapat dibatalkan dari sini.")
+    elif st.button("Batalkan", key=f"batal_{job_id}"):
+        job_manager.cancel(job_id, owner)
+
+
+def background_stage(stage, inputs, params, compute, label):
+    """Hasil tahap dari cache, atau jalankan ``compute(progress)`` sebagai job latar belakang.
+
+    Mengembalikan ``None`` selama job belum selesai (progres dan tombol batal
+    ditampilkan). Job untuk input yang sama dipakai ulang, jadi berpindah
+    halaman tidak membuang pekerjaan yang sedang berjalan.
+    """
+    key = stage_cache.make_key(stage, inputs, params)
+    found, value = stage_cache.lookup(key)
+    if found:
+        return value
+
+    # Job berjalan di thread worker; jejaknya direkam tracer sendiri dan tampil di panel instrumentasi
+    job = job_manager.submit(
+        stage, lambda job: compute(job.report), key=key, owner=session_owner(),
+        on_done=lambda result: stage_cache.put(key, result), tracer=Tracer(memory=trace_memory)
+    )
+    if job.status == DONE:
+        return job.result
+    if job.status in (FAILED, CANCELLED):
+        if job.status == FAILED:
+            st.error(f"❌ {label} gagal: {job.error}")
+        else:
+            st.warning(f"⚠️ {label} dibatalkan.")
+        if st.button("Jalankan lagi", key=f"ulang_{stage}"):
+            job_manager.forget(job.id)
+            st.rerun()
+        return None
+    job_progress(job.id, label)
+    return None
+
+
+def cached_embedding(X, labels, metric):
+    from clustering.embedding import embed_2d
+
+    # Label hanya memengaruhi hasil pada mode sampel (stratifikasi)
+    inputs = [np.asarray(X), np.asarray(labels)] if embed_mode == 'sampel' else [np.asarray(X)]
+    params = {'mode': embed_mode, 'metric': metric, 'sample_size': embed_sample_size}
+    return background_stage(
+        'embedding', inputs, params,
+        lambda progress: embed_2d(X, embed_mode, metric, labels=labels, sample_size=embed_sample_size,
+                                  random_state=42, progress=progress),
+        "Embedding 2-D"
+    )
+
+
+def rock_sample_controls(key, n_rows):
+    """Ukuran sampel ROCK pilihan pengguna, atau ``None`` untuk grid atas semua baris."""
+    sampled = st.checkbox(
+        "Mode sampel (grid ROCK atas sampel acak)", value=False, key=f"{key}_sampel",
+        help="Pencarian theta × k dan seleksi CP* berjalan atas sampel acak. Setiap baris lain mendapat "
+             "klaster dengan tetangga terbanyak di sampel, dinormalisasi ukuran klaster."
+    )
+    if not sampled:
+        return None
+    size = st.number_input(
+        "Ukuran sampel ROCK", min_value=100, max_value=max(100, n_rows), value=min(ROCK_SAMPLE_SIZE, max(100, n_rows)),
+        step=500, key=f"{key}_ukuran_sampel"
+    )
+    if size >= n_rows:
+        st.caption("Ukuran sampel ≥ jumlah data; grid berjalan atas semua baris.")
+        return None
+    return int(size)
+
+
+def rock_grid_stage(stage, inputs, params, run_grid, label, sample_size):
+    """Grid ROCK ``run_grid(progress, sample_size)`` sebagai job latar belakang.
+
+    Pada mode sampel dengan data yang cukup kecil, pengguna bisa meminta run
+    penuh sebagai pembanding; hasilnya dikembalikan sebagai (grid, kecocokan).
+    """
+    if sample_size is None:
+        return background_stage(stage, inputs, params, lambda progress: run_grid(progress, None), label), None
+    grid = background_stage(
+        stage, inputs, {**params, 'sample_size': sample_size},
+        lambda progress: run_grid(progress, sample_size), f"{label} (sampel)"
+    )
+    if grid is None or len(grid['labels']) > ROCK_AGREEMENT_MAX_ROWS:
+        return grid, None
+    if not st.checkbox("Bandingkan dengan run penuh", value=False, key=f"{stage}_banding",
+                       help="Jalankan grid atas semua baris dan ukur kecocokan label (ARI)."):
+        return grid, None
+    # Kunci sama dengan mode non-sampel, jadi run penuh yang sudah ada dipakai ulang
+    full = background_stage(stage, inputs, params, lambda progress: run_grid(progress, None), f"{label} penuh")
+    if full is None:
+        return grid, None
+    from clustering.pipeline import sampling_agreement
+
+    agreement = sampling_agreement(grid, full)
+    st.info(
+        f"Kecocokan dengan run penuh: ARI = {agreement['ari']:.4f}; run penuh memilih theta = {full['theta']}, "
+        f"k = {full['k']}, CP* = {full['CP']:.4f}."
+    )
+    return grid, agreement
+
+
+def preview_table(df, key, page_size=100):
+    """Tampilkan satu halaman tabel saja; dataset besar tidak dikirim utuh ke browser."""
+    n_pages = max(1, -(-len(df) // page_size))
+    page = st.number_input(f"Halaman (dari {n_pages})", min_value=1, max_value=n_pages, value=1, key=f"{key}_page")
+    start = (page - 1) * page_size
+    st.dataframe(df.iloc[start:start + page_size])
+
+
+def cached_figure(name, inputs, params, build):
+    # Plot yang inputnya tidak berubah dipakai ulang sebagai PNG tanpa digambar ulang
+    from clustering.plotting import figure_png
+
+    png = stage_cache.get_or_compute(f'plot_{name}', inputs, params, lambda: figure_png(build()))
+    st.image(png)
+
+
+def finish_run():
+    """Tutup tracer rerun ini dan isi panel instrumentasi di sidebar."""
+    tracer.stop()
+    with trace_panel:
+        jobs = [job for job in job_manager.jobs(owner=session_owner()) if job.done and job.tracer is not None]
+        summary = tracer.summary()
+        if not summary and not jobs:
+            st.caption("Belum ada tahap terukur pada rerun ini.")
+            return
+        st.caption("Total per tahap pada rerun terakhir dan pada job latar belakang sesi ini. Kerja di "
+                   "worker paralel (n_jobs > 1) hanya tampak sebagai span induknya.")
+        if any(t.memory_requested and not t.memory for t in [tracer, *(job.tracer for job in jobs)]):
+            st.caption("Memori puncak diukur oleh satu tracer saja pada satu waktu (tracemalloc global per proses); "
+                       "rerun atau job yang berjalan bersamaan tercatat tanpa memori.")
+        if summary:
+            st.dataframe(pd.DataFrame(summary).set_index('span').round(4))
+        for job in jobs:
+            st.markdown(f"**Job {job.stage}** ({job.status})")
+            job_summary = job.tracer.summary()
+            if job_summary:
+                st.dataframe(pd.DataFrame(job_summary).set_index('span').round(4))
+        trace = {'rerun': tracer.to_dict(), 'job': {f'{job.stage}_{job.id}': job.tracer.to_dict() for job in jobs}}
+        st.download_button(
+            label="Unduh jejak (JSON)",
+            data=json.dumps(trace, indent=2, default=float),
+            file_name="jejak_clustering.json",
+            mime='application/json'
+        )
+
+
+def stop_page():
+    # Halaman menunggu job latar belakang; bagian berikutnya dirender saat job selesai
+    # (panel instrumentasi diisi oleh blok finally di bawah)
+    st.stop()
+
+
 # Inisialisasi session state
 if "df" not in st.session_state:
     st.session_state.df = None
 if "df_zscore" not in st.session_state:
     st.session_state.df_zscore = None
-
-# =============== HOME ===============
-if menu == "🏠 Home":
-    st.title("📘 Selamat Datang di Aplikasi Clustering UMKM")
-    tab1, tab2 = st.tabs(["📋 About", "📜 Rules"])
-    with tab1:
-        st.markdown("""
-        ### Tentang Aplikasi
-        Aplikasi ini dirancang untuk mengelompokkan data UMKM di Kabupaten Malang menggunakan:
-        - Agglomerative Hierarchical Clustering (AHC)
-        - Robust Clustering using Links (Ensemble ROCK)
-        """)
-    with tab2:
-        st.markdown("""
-        ### Aturan Penggunaan
-        **Format CSV wajib memuat kolom:**
-        - `modal`, `omset`, `tenaga_kerja`: angka bulat
-        - `ojol`: "ya" / "tidak"
-        - `jenis`: "mamin" / "oleh"
-        """)
-
-# =============== UPLOAD ===============
-elif menu == "📂 Upload Data":
-    st.title("📂 Upload Dataset UMKM")
-    uploaded_file = st.file_uploader("Unggah file CSV", type="csv")
-    if uploaded_file:
-        try:
-            df = pd.read_csv(uploaded_file)
-            st.session_state.df = df
-            st.success("✅ File berhasil diunggah!")
-            st.dataframe(df)
-        except Exception as e:
-            st.error(f"Terjadi kesalahan saat membaca file: {e}")
-
-# =============== PREPROCESSING ===============
-elif menu == "⚙️ Data Preprocessing":
-    st.title("⚙️ Tahap Preprocessing Data")
-    df = st.session_state.df
-    if df is None:
-        st.warning("⚠️ Silakan unggah data terlebih dahulu.")
-    else:
-        try:
-            df['jenis'] = df['jenis'].str.strip().str.lower()
-            df['ojol'] = df['ojol'].str.strip().str.lower()
-            st.subheader("1. Distribusi Kategori")
-            col1, col2 = st.columns(2)
-            with col1:
-                fig1, ax1 = plt.subplots()
-                sns.countplot(data=df, x='jenis', ax=ax1)
-                st.pyplot(fig1)
-            with col2:
-                fig2, ax2 = plt.subplots()
-                sns.countplot(data=df, x='ojol', ax=ax2)
-                st.pyplot(fig2)
-
-            st.subheader("2. Statistik Deskriptif")
-            cols_num = ['omset', 'tenaga kerja', 'modal']
-            st.dataframe(df[cols_num].describe())
-
-            st.subheader("3. Missing Values")
-            st.dataframe(df.isnull().sum())
-
-            st.subheader("4. Boxplot Sebelum Outlier Handling")
-            fig3, ax3 = plt.subplots()
-            sns.boxplot(data=df[cols_num], ax=ax3)
-            st.pyplot(fig3)
-
-            for col in cols_num:
-                Q1 = df[col].quantile(0.25)
-                Q3 = df[col].quantile(0.75)
-                IQR = Q3 - Q1
-                lower = Q1 - 1.5 * IQR
-                upper = Q3 + 1.5 * IQR
-                df[col] = df[col].clip(lower=lower, upper=upper)
-
-            st.subheader("5. Boxplot Setelah Outlier Handling")
-            fig4, ax4 = plt.subplots()
-            sns.boxplot(data=df[cols_num], ax=ax4)
-            st.pyplot(fig4)
-
-            st.subheader("6. Normalisasi Data Z-Score")
-            df_zscore = df.copy()
-            df_zscore[cols_num] = df_zscore[cols_num].apply(zscore)
-            st.session_state.df_zscore = df_zscore
-            st.dataframe(df_zscore[cols_num].head())
-        except Exception as e:
-            st.error(f"Terjadi kesalahan saat preprocessing: {e}")
-
-# =============== CLUSTERING NUMERIK ===============
-elif menu == "📊 Clustering Numerik":
-    st.title("📊 Clustering Data Numerik (AHC)")
-    df_zscore = st.session_state.df_zscore
-    df = st.session_state.df
-    if df_zscore is None:
-        st.warning("⚠️ Data belum tersedia. Lakukan preprocessing terlebih dahulu.")
-    else:
-        try:
-            X = df_zscore[['omset', 'tenaga kerja', 'modal']]
-            X_scaled = StandardScaler().fit_transform(X)
-            n = len(X_scaled)
-            global_mean = np.mean(X_scaled, axis=0)
-            linkage_types = ['single', 'complete', 'average']
-            best_result = {'k': None, 'link': None, 'PseudoF': -np.inf, 'ICD': np.inf}
-            results = []
-
-            for link in linkage_types:
-                for k in range(2, 7):
-                    model = AgglomerativeClustering(n_clusters=k, linkage=link)
-                    labels = model.fit_predict(X_scaled)
-                    SW = 0
-                    SB = 0
-                    for cl in np.unique(labels):
-                        cluster_data = X_scaled[labels == cl]
-                        mean_cl = np.mean(cluster_data, axis=0)
-                        SW += np.sum((cluster_data - mean_cl) ** 2)
-                        SB += len(cluster_data) * np.sum((mean_cl - global_mean) ** 2)
-                    pseudoF = (SB / (k - 1)) / (SW / (n - k)) if SW != 0 else np.inf
-                    ICD = SW / n
-                    results.append((link, k, pseudoF, ICD))
-                    if pseudoF > best_result['PseudoF']:
-                        best_result = {'k': k, 'link': link, 'PseudoF': pseudoF, 'ICD': ICD}
-
-            result_df = pd.DataFrame(results, columns=['Linkage', 'K', 'Pseudo-F', 'ICD'])
-            st.dataframe(result_df.style.format({'Pseudo-F': '{:.4f}', 'ICD': '{:.4f}'}))
-
-            st.subheader("🏆 Hasil Clustering Terbaik")
-            st.markdown(f"""
-            - Jumlah klaster optimum: **{best_result['k']}**
-            - Metode linkage terbaik: **{best_result['link'].capitalize()}**
-            - Nilai Pseudo-F tertinggi: **{best_result['PseudoF']:.4f}**
-            - Nilai ICD terkecil: **{best_result['ICD']:.4f}**
+# Data mentah hasil unggahan (untuk plot "sebelum") dan transformer yang di-fit atasnya
+if "df_raw" not in st.session_state:
+    st.session_state.df_raw = None
+if "preprocessor" not in st.session_state:
+    st.session_state.preprocessor = None
+# Parameter terbaik dan metrik per tahap, bentuknya sama dengan metrics pada run_pipeline
+if "metrics" not in st.session_state:
+    st.session_state.metrics = {}
+
+# Tracer rerun selalu ditutup, juga saat st.stop/st.rerun atau error tak tertangkap di halaman
+try:
+    # =============== HOME ===============
+    if menu == "🏠 Home":
+        st.title("📘 Selamat Datang di Aplikasi Clustering UMKM")
+        tab1, tab2 = st.tabs(["📋 About", "📜 Rules"])
+        with tab1:
+            st.markdown("""
+            ### Tentang Aplikasi
+            Aplikasi ini dirancang untuk mengelompokkan data UMKM di Kabupaten Malang menggunakan:
+            - Agglomerative Hierarchical Clustering (AHC)
+            - Robust Clustering using Links (Ensemble ROCK)
+            """)
+        with tab2:
+            st.markdown("""
+            ### Aturan Penggunaan
+            **Format CSV wajib memuat kolom:**
+            - `modal`, `omset`, `tenaga_kerja`: angka bulat
+            - `ojol`: "ya" / "tidak"
+            - `jenis`: "mamin" / "oleh"
             """)
 
-            # Clustering & visualisasi t-SNE dan dendrogram
-            from sklearn.manifold import TSNE
-            from scipy.cluster.hierarchy import dendrogram, linkage
-
-            best_model = AgglomerativeClustering(n_clusters=best_result['k'], linkage=best_result['link'])
-            best_labels = best_model.fit_predict(X_scaled)
-            df['cluster_numerik'] = best_labels
-            st.session_state.df = df
-
-            # t-SNE
-            tsne = TSNE(n_components=2, random_state=42)
-            X_reduced = tsne.fit_transform(X_scaled)
-
-            st.subheader("🔸 Visualisasi t-SNE")
-            fig_tsne = plt.figure(figsize=(8, 6))
-            for cl in np.unique(best_labels):
-                plt.scatter(
-                    X_reduced[best_labels == cl, 0],
-                    X_reduced[best_labels == cl, 1],
-                    label=f'Cluster {cl+1}'
+    # =============== UPLOAD ===============
+    elif menu == "📂 Upload Data":
+        st.title("📂 Upload Dataset UMKM")
+        uploaded_file = st.file_uploader("Unggah file CSV, Parquet, atau Arrow", type=SUPPORTED_TYPES)
+        if uploaded_file:
+            try:
+                df = stage_cache.get_or_compute(
+                    'baca_data', [uploaded_file.getvalue()], {'name': uploaded_file.name},
+                    lambda: read_umkm(uploaded_file, uploaded_file.name)
                 )
-            plt.title(f'Visualisasi Clustering dengan t-SNE\nLinkage={best_result["link"].upper()}, k={best_result["k"]}')
-            plt.xlabel("t-SNE 1")
-            plt.ylabel("t-SNE 2")
-            plt.legend()
-            plt.grid(True)
-            st.pyplot(fig_tsne)
-
-            # Dendrogram
-            st.subheader("🧬 Dendrogram Hierarki")
-            linked = linkage(X_scaled, method=best_result['link'])
-            fig_dendro = plt.figure(figsize=(10, 6))
-            dendrogram(linked, orientation='top', distance_sort='descending', show_leaf_counts=False)
-            plt.title(f'Dendrogram Linkage={best_result["link"].upper()}')
-            plt.xlabel("Data")
-            plt.ylabel("Jarak (distance)")
-            st.pyplot(fig_dendro)
-
-        except Exception as e:
-            st.error(f"❌ Terjadi kesalahan: {e}")
-
-# =============== CLUSTERING KATEGORIK ===============
-elif menu == "🧮 Clustering Kategorik":
-    st.title("🧮 Clustering Data Kategorik")
-    df = st.session_state.df
-
-    if df is None:
-        st.warning("⚠️ Silakan unggah dan preprocessing data terlebih dahulu.")
-    else:
-        try:
-            st.subheader("🔢 Clustering dengan ROCK (jenis & ojol)")
-
-            # 1. Fungsi bantu
-            def jaccard_similarity_matrix(encoded):
-                return 1 - pairwise_distances(encoded, metric="hamming")
-
-            def get_neighbors(sim_matrix, theta):
-                n = sim_matrix.shape[0]
-                neighbors = [set(np.where(sim_matrix[i] >= theta)[0]) - {i} for i in range(n)]
-                return neighbors
-
-            def calculate_links(neighbors):
-                n = len(neighbors)
-                links = np.zeros((n, n), dtype=int)
-                for i, j in combinations(range(n), 2):
-                    common = neighbors[i].intersection(neighbors[j])
-                    links[i, j] = links[j, i] = len(common)
-                return links
-
-            def rock_clustering(df_cat, theta, k_opt):
-                encoded = pd.DataFrame()
-                for col in df_cat.columns:
-                    le = LabelEncoder()
-                    encoded[col] = le.fit_transform(df_cat[col])
-                sim_matrix = jaccard_similarity_matrix(encoded)
-                neighbors = get_neighbors(sim_matrix, theta)
-                links = calculate_links(neighbors)
-
-                dist = 1 / (links + 1e-5)
-                np.fill_diagonal(dist, 0)
-                condensed_dist = squareform(dist, checks=False)
-                linkage_matrix = linkage(condensed_dist, method='average')
-                labels = fcluster(linkage_matrix, t=k_opt, criterion='maxclust')
-                return labels, encoded
-
-            def compute_cp_star(encoded, labels):
-                sim_matrix = jaccard_similarity_matrix(encoded)
-                N = len(labels)
-                cp_total = 0
-                unique_labels = np.unique(labels)
-
-                for lbl in unique_labels:
-                    indices = np.where(labels == lbl)[0]
-                    n_k = len(indices)
-                    if n_k <= 1:
-                        continue
-                    sim_sum = 0
-                    for i, j in combinations(indices, 2):
-                        sim_sum += sim_matrix[i, j]
-                    sim_avg = sim_sum / (n_k * (n_k - 1) / 2)
-                    cp_total += n_k * sim_avg
-
-                cp_star = cp_total / N
-                return cp_star
-
-            # 2. Siapkan data kategorikal
-            df_cat = df[['ojol', 'jenis']].copy()
-            theta_list = [0.05, 0.1, 0.12, 0.15, 0.17, 0.2, 0.22, 0.25, 0.27, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
-            k_range = range(2, 5)
-
-            best_cp = -np.inf
-            best_labels = None
-            best_theta = None
-            best_k = None
-
-            for theta in theta_list:
-                for k_opt in k_range:
-                    labels, encoded = rock_clustering(df_cat, theta, k_opt)
-                    cp_star = compute_cp_star(encoded, labels)
-                    if cp_star > best_cp:
-                        best_cp = cp_star
-                        best_labels = labels
-                        best_theta = theta
-                        best_k = k_opt
-
-            # 3. Simpan hasil ke dataframe
-            df['cluster_kategorik'] = best_labels
-            st.session_state.df = df
-
-            st.success(f"✅ Clustering selesai! Theta terbaik = {best_theta}, k = {best_k}, CP* = {best_cp:.4f}")
-            st.subheader("📋 Preview Hasil Clustering")
-            st.dataframe(df[['ojol', 'jenis', 'cluster_kategorik']])
-
-            st.subheader("📈 Distribusi Cluster")
-            fig, ax = plt.subplots()
-            sns.countplot(x=df['cluster_kategorik'], palette='viridis', ax=ax)
-            ax.set_title("Distribusi Hasil Clustering Kategorik (ROCK)")
-            ax.set_xlabel("Cluster")
-            ax.set_ylabel("Jumlah Data")
-            st.pyplot(fig)
-
-            # 4. Visualisasi t-SNE Hasil Clustering ROCK
-            st.subheader("🔍 Visualisasi t-SNE Hasil Clustering ROCK")
-
-            # Gunakan encoded dari hasil clustering terbaik
-            sim_matrix = jaccard_similarity_matrix(encoded)
-            dist_matrix = 1 - sim_matrix
-
-            # Jalankan t-SNE
-            tsne = TSNE(n_components=2, metric='precomputed', init='random', random_state=42)
-            X_tsne = tsne.fit_transform(dist_matrix)
-
-            # Visualisasi
-            fig_tsne = plt.figure(figsize=(8, 6))
-            for cl in np.unique(best_labels):
-                idx = np.where(best_labels == cl)
-                plt.scatter(
-                    X_tsne[idx, 0],
-                    X_tsne[idx, 1],
-                    label=f'Cluster {cl}'
+                if st.session_state.df_raw is not df:
+                    # df_raw tetap objek cache (read-only); halaman analisis menambah kolom ke salinan dangkal
+                    st.session_state.df_raw = df
+                    st.session_state.df = df.copy(deep=False)
+                    st.session_state.df_zscore = None
+                    st.session_state.preprocessor = None
+                st.success(f"✅ File berhasil diunggah! {len(df):,} baris, {memory_mb(df):.1f} MB di memori.")
+                preview_table(df, key='upload')
+            except Exception as e:
+                st.error(f"Terjadi kesalahan saat membaca file: {e}")
+
+    # =============== PREPROCESSING ===============
+    elif menu == "⚙️ Data Preprocessing":
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from clustering.preprocessing import Preprocessor
+
+        st.title("⚙️ Tahap Preprocessing Data")
+        df = st.session_state.df_raw
+        if df is None:
+            st.warning("⚠️ Silakan unggah data terlebih dahulu.")
+        else:
+            try:
+                cols_num = NUM_COLS
+                # Fit sekali per data unggahan; kunjungan ulang tidak memproses apa pun lagi
+                if st.session_state.preprocessor is None:
+                    preprocessor = stage_cache.get_or_compute(
+                        'preprocessing', [df], {'cols_num': cols_num}, lambda: Preprocessor(cols_num).fit(df)
+                    )
+                    st.session_state.df, st.session_state.df_zscore = preprocessor.transform(df)
+                    st.session_state.preprocessor = preprocessor
+                df_clean, df_zscore = st.session_state.df, st.session_state.df_zscore
+
+                st.subheader("1. Distribusi Kategori")
+                col1, col2 = st.columns(2)
+                with col1:
+                    fig1, ax1 = plt.subplots()
+                    sns.countplot(data=df_clean, x='jenis', ax=ax1)
+                    st.pyplot(fig1)
+                with col2:
+                    fig2, ax2 = plt.subplots()
+                    sns.countplot(data=df_clean, x='ojol', ax=ax2)
+                    st.pyplot(fig2)
+
+                st.subheader("2. Statistik Deskriptif")
+                st.dataframe(df[cols_num].describe())
+
+                st.subheader("3. Missing Values")
+                st.dataframe(df.isnull().sum())
+
+                st.subheader("4. Boxplot Sebelum Outlier Handling")
+                fig3, ax3 = plt.subplots()
+                sns.boxplot(data=df[cols_num], ax=ax3)
+                st.pyplot(fig3)
+
+                st.subheader("5. Boxplot Setelah Outlier Handling")
+                fig4, ax4 = plt.subplots()
+                sns.boxplot(data=df_clean[cols_num], ax=ax4)
+                st.pyplot(fig4)
+
+                st.subheader("6. Normalisasi Data Z-Score")
+                st.dataframe(df_zscore[cols_num].head())
+            except Exception as e:
+                st.error(f"Terjadi kesalahan saat preprocessing: {e}")
+
+    # =============== CLUSTERING NUMERIK ===============
+    elif menu == "📊 Clustering Numerik":
+        from sklearn.preprocessing import StandardScaler
+        from clustering.engine import ahc_grid_search
+        from clustering.pipeline import numeric_metrics
+        from clustering.plotting import cluster_scatter_figure, dendrogram_figure
+
+        st.title("📊 Clustering Data Numerik (AHC)")
+        df_zscore = st.session_state.df_zscore
+        df = st.session_state.df
+        if df_zscore is None:
+            st.warning("⚠️ Data belum tersedia. Lakukan preprocessing terlebih dahulu.")
+        else:
+            try:
+                X = df_zscore[['omset', 'tenaga kerja', 'modal']]
+                X_scaled = StandardScaler().fit_transform(X)
+                # Satu pohon linkage per metode, semua k dipotong dari pohon yang sama
+                ahc_params = {
+                    'linkage_types': LINKAGE_TYPES, 'k_range': NUMERIC_K_RANGE,
+                    'large_n_threshold': large_n_threshold, 'n_micro': NUMERIC_MICRO_CLUSTERS,
+                }
+                best_result = background_stage(
+                    'ahc', [X_scaled], ahc_params,
+                    lambda progress: ahc_grid_search(X_scaled, n_jobs=n_jobs, progress=progress, **ahc_params),
+                    "Sweep AHC"
                 )
-            plt.title(f'Visualisasi ROCK Clustering\nTheta={best_theta}, k={best_k}, CP*={best_cp:.4f}')
-            plt.xlabel('t-SNE 1')
-            plt.ylabel('t-SNE 2')
-            plt.legend()
-            plt.grid(True)
-            st.pyplot(fig_tsne)
-
-        except Exception as e:
-            st.error(f"❌ Terjadi kesalahan saat melakukan clustering ROCK: {e}")
-
-# =============== CLUSTERING ENSEMBLE ===============
-elif menu == "🔗 Clustering Ensemble":
-    st.title("🔗 Clustering Ensemble (ROCK)")
-
-    df = st.session_state.df
-
-    if df is None or 'cluster_numerik' not in df or 'cluster_kategorik' not in df:
-        st.warning("⚠️ Pastikan data sudah diproses melalui Clustering Numerik dan Kategorik terlebih dahulu.")
-    else:
-        try:
-            from sklearn.preprocessing import OneHotEncoder
-            from sklearn.manifold import TSNE
-
-            st.subheader("⚙️ Proses Ensemble Clustering")
-
-            # ===============================
-            # FUNGSI ROCK Clustering
-            # ===============================
-
-            def jaccard_similarity_matrix(encoded):
-                return 1 - pairwise_distances(encoded, metric="hamming")
-
-            def get_neighbors(sim_matrix, theta):
-                n = sim_matrix.shape[0]
-                neighbors = [set(np.where(sim_matrix[i] >= theta)[0]) - {i} for i in range(n)]
-                return neighbors
-
-            def calculate_links(neighbors):
-                n = len(neighbors)
-                links = np.zeros((n, n), dtype=int)
-                for i, j in combinations(range(n), 2):
-                    common = neighbors[i].intersection(neighbors[j])
-                    links[i, j] = links[j, i] = len(common)
-                return links
-
-            def rock_clustering(df_cat, theta, k_opt):
-                encoded = pd.DataFrame()
-                for col in df_cat.columns:
-                    le = LabelEncoder()
-                    encoded[col] = le.fit_transform(df_cat[col])
-
-                sim_matrix = jaccard_similarity_matrix(encoded)
-                neighbors = get_neighbors(sim_matrix, theta)
-                links = calculate_links(neighbors)
-
-                dist = 1 / (links + 1e-5)
-                np.fill_diagonal(dist, 0)
-                condensed_dist = squareform(dist, checks=False)
-
-                linkage_matrix = linkage(condensed_dist, method='average')
-                labels = fcluster(linkage_matrix, t=k_opt, criterion='maxclust')
-                return labels
-
-            def compute_cp_star(encoded, labels):
-                sim_matrix = 1 - pairwise_distances(encoded, metric="hamming")
-                N = len(labels)
-                cp_total = 0
-                unique_labels = np.unique(labels)
-
-                for lbl in unique_labels:
-                    indices = np.where(labels == lbl)[0]
-                    n_k = len(indices)
-                    if n_k <= 1:
-                        continue
-                    sim_sum = sum(sim_matrix[i, j] for i, j in combinations(indices, 2))
-                    sim_avg = sim_sum / (n_k * (n_k - 1) / 2)
-                    cp_total += n_k * sim_avg
-
-                return cp_total / N
-
-            # ===============================
-            # PROSES CLUSTERING ENSEMBLE
-            # ===============================
-            df_ensemble_input = df[['cluster_numerik', 'cluster_kategorik']].astype(str)
-            encoder = OneHotEncoder(sparse_output=False)
-            encoded_ensemble = encoder.fit_transform(df_ensemble_input)
-
-            theta_list = [0.05, 0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]
-            best_cp = -np.inf
-            best_labels = None
-            best_theta = None
-            best_k = None
-
-            progress = st.progress(0)
-            total_loop = len(theta_list) * 3
-            loop_count = 0
-
-            for theta in theta_list:
-                for k_opt in range(2, 5):
-                    labels_ensemble = rock_clustering(df_ensemble_input, theta, k_opt=k_opt)
-                    cp_star = compute_cp_star(pd.DataFrame(encoded_ensemble), labels_ensemble)
-
-                    if cp_star > best_cp:
-                        best_cp = cp_star
-                        best_labels = labels_ensemble
-                        best_theta = theta
-                        best_k = k_opt
-
-                    loop_count += 1
-                    progress.progress(loop_count / total_loop)
-
-            df['cluster_ensemble_rock'] = best_labels
-            st.session_state.df = df
-
-            st.success(f"✅ Clustering ensemble selesai! Theta terbaik = {best_theta}, k = {best_k}, CP* = {best_cp:.4f}")
-            st.subheader("📋 Hasil Clustering Ensemble")
-            st.dataframe(df[['cluster_numerik', 'cluster_kategorik', 'cluster_ensemble_rock']])
-
-            st.subheader("📈 Distribusi Cluster Ensemble")
-            fig, ax = plt.subplots()
-            sns.countplot(x=df['cluster_ensemble_rock'], palette='magma', ax=ax)
-            ax.set_title("Distribusi Cluster Ensemble (ROCK)")
-            ax.set_xlabel("Cluster")
-            ax.set_ylabel("Jumlah Data")
-            st.pyplot(fig)
-
-            # ===============================
-            # t-SNE Visualisasi Hasil Ensemble
-            # ===============================
-            st.subheader("🔍 Visualisasi t-SNE Hasil Ensemble")
-
-            sim_matrix = jaccard_similarity_matrix(pd.DataFrame(encoded_ensemble))
-            dist_matrix = 1 - sim_matrix
-
-            tsne = TSNE(n_components=2, metric='precomputed', init='random', random_state=42)
-            X_tsne = tsne.fit_transform(dist_matrix)
-
-            fig_tsne = plt.figure(figsize=(8, 6))
-            for cl in np.unique(best_labels):
-                plt.scatter(
-                    X_tsne[np.array(best_labels) == cl, 0],
-                    X_tsne[np.array(best_labels) == cl, 1],
-                    label=f'Cluster {cl}'
+                if best_result is None:
+                    stop_page()
+                if best_result['summarized']:
+                    st.info(f"ℹ️ Data besar ({len(X_scaled):,} baris): AHC dijalankan atas "
+                            f"{NUMERIC_MICRO_CLUSTERS} micro-cluster, lalu setiap baris mengikuti klasternya.")
+                results = best_result['results']
+
+                result_df = pd.DataFrame(results, columns=['Linkage', 'K', 'Pseudo-F', 'ICD'])
+                st.dataframe(result_df.style.format({'Pseudo-F': '{:.4f}', 'ICD': '{:.4f}'}))
+
+                st.subheader("🏆 Hasil Clustering Terbaik")
+                st.markdown(f"""
+                - Jumlah klaster optimum: **{best_result['k']}**
+                - Metode linkage terbaik: **{best_result['link'].capitalize()}**
+                - Nilai Pseudo-F tertinggi: **{best_result['PseudoF']:.4f}**
+                - Nilai ICD terkecil: **{best_result['ICD']:.4f}**
+                """)
+
+                # Clustering & visualisasi 2-D dan dendrogram
+                best_labels = best_result['labels']
+                df['cluster_numerik'] = best_labels
+                st.session_state.metrics['numerik'] = numeric_metrics(best_result)
+                st.session_state.df = df
+
+                # Embedding 2-D (t-SNE / t-SNE cepat / PCA)
+                X_reduced = cached_embedding(X_scaled, best_labels, 'euclidean')
+
+                st.subheader(f"🔸 Visualisasi {embed_axis}")
+                title = f'Visualisasi Clustering dengan {embed_axis}\nLinkage={best_result["link"].upper()}, k={best_result["k"]}'
+                if X_reduced is not None:
+                    cached_figure(
+                        'scatter', [X_reduced, best_labels], {'title': title, 'axis': embed_axis},
+                        lambda: cluster_scatter_figure(X_reduced, best_labels, title, embed_axis, label_offset=1)
+                    )
+
+                # Dendrogram (dipotong ke cabang teratas untuk data besar)
+                st.subheader("🧬 Dendrogram Hierarki")
+                linked = best_result['linkage_matrix']
+                title = f'Dendrogram Linkage={best_result["link"].upper()}'
+                xlabel = "Micro-cluster" if best_result['summarized'] else "Data"
+                cached_figure(
+                    'dendrogram', [linked], {'title': title, 'xlabel': xlabel},
+                    lambda: dendrogram_figure(linked, title, xlabel)
                 )
-            plt.title(f'Visualisasi ROCK Clustering Ensemble\nTheta={best_theta}, k={best_k}, CP*={best_cp:.4f}')
-            plt.xlabel('t-SNE 1')
-            plt.ylabel('t-SNE 2')
-            plt.legend()
-            plt.grid(True)
-            st.pyplot(fig_tsne)
-
-        except Exception as e:
-            st.error(f"❌ Terjadi kesalahan saat ensemble clustering: {e}")
-
-# =============== EVALUASI CLUSTERING ENSEMBLE ===============
-elif menu == "📏 Evaluasi Clustering Ensemble":
-    st.title("📏 Evaluasi Clustering Ensemble")
-
-    df = st.session_state.df
-    if df is None or 'cluster_ensemble_rock' not in df:
-        st.warning("⚠️ Pastikan Anda telah menyelesaikan proses Clustering Ensemble terlebih dahulu.")
-    else:
-        try:
-            st.subheader("📌 Davies-Bouldin Index (DBI)")
-
-            from sklearn.metrics import davies_bouldin_score
-
-            # Gunakan kembali encoded_ensemble untuk hitung Jaccard similarity dan distance matrix
-            from sklearn.preprocessing import OneHotEncoder
-            encoded_ensemble = OneHotEncoder(sparse_output=False).fit_transform(
-                df[['cluster_numerik', 'cluster_kategorik']].astype(str)
-            )
-            sim_matrix = 1 - pairwise_distances(pd.DataFrame(encoded_ensemble), metric="hamming")
-            dist_matrix = 1 - sim_matrix
 
-            # Gunakan best_labels dari clustering ensemble
-            labels = df['cluster_ensemble_rock'].values
-            db_index = davies_bouldin_score(dist_matrix, labels)
-
-            st.success(f"✔️ Nilai Davies-Bouldin Index (DBI): **{db_index:.4f}**")
-            st.markdown("""
-            **Interpretasi:**
-            - DBI yang lebih rendah menandakan cluster yang lebih baik (semakin kecil semakin baik).
-            - Nilai DBI < 1 umumnya dianggap baik dalam praktik clustering.
-            """)
-        except Exception as e:
-            st.error(f"❌ Terjadi kesalahan saat menghitung DBI: {e}")
-
-# =============== INTERPRETASI CLUSTERING ENSEMBLE ===============
-elif menu == "🧾 Interpretasi Hasil":
-    st.title("🧾 Interpretasi Hasil Clustering Ensemble")
-
-    df = st.session_state.df
-    if df is None or 'cluster_ensemble_rock' not in df:
-        st.warning("⚠️ Pastikan hasil clustering ensemble sudah tersedia.")
-    else:
-        try:
-            st.subheader("📈 Rata-rata Omset, Tenaga Kerja, dan Modal per Cluster")
+            except Exception as e:
+                st.error(f"❌ Terjadi kesalahan: {e}")
+
+    # =============== CLUSTERING KATEGORIK ===============
+    elif menu == "🧮 Clustering Kategorik":
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from clustering.engine import rock_grid_search
+        from clustering.pipeline import rock_metrics
+        from clustering.plotting import cluster_scatter_figure
+
+        st.title("🧮 Clustering Data Kategorik")
+        df = st.session_state.df
+
+        if df is None:
+            st.warning("⚠️ Silakan unggah dan preprocessing data terlebih dahulu.")
+        else:
+            try:
+                st.subheader("🔢 Clustering dengan ROCK (jenis & ojol)")
+                compress = st.checkbox(
+                    "Mode terkompresi (profil kategori unik)", value=False,
+                    help="Baris dengan kombinasi kategori identik digabung menjadi satu profil berbobot, "
+                         "sehingga waktu proses bergantung pada jumlah profil, bukan jumlah data. Hasilnya "
+                         "aproksimasi: theta, k, dan label bisa berbeda dari run atas semua baris."
+                )
 
-            # Hitung rata-rata per cluster
-            mean_stats = df.groupby('cluster_ensemble_rock')[['omset', 'tenaga kerja', 'modal']].mean().round(2)
-            cluster_list = mean_stats.index.tolist()
+                sample_size = rock_sample_controls('rock', len(df))
+
+                # 1. Siapkan data kategorikal
+                df_cat = df[['ojol', 'jenis']].copy()
+                theta_list = CATEGORICAL_THETAS
+                k_range = ROCK_K_RANGE
+
+                # 2. Grid search theta × k (satu pohon per theta, dipotong untuk setiap k)
+                grid, agreement = rock_grid_stage(
+                    'rock', [df_cat],
+                    {'theta_list': theta_list, 'k_range': k_range, 'compress': compress, 'method': rock_method},
+                    lambda progress, size: rock_grid_search(
+                        df_cat, theta_list, k_range, progress=progress, compress=compress, n_jobs=n_jobs,
+                        sample_size=size, method=rock_method
+                    ),
+                    "Grid ROCK", sample_size
+                )
+                if grid is None:
+                    stop_page()
+                best_cp = grid['CP']
+                best_labels = grid['labels']
+                best_theta = grid['theta']
+                best_k = grid['k']
+                encoded = grid['encoded']
+
+                # 3. Simpan hasil ke dataframe
+                df['cluster_kategorik'] = best_labels
+                st.session_state.metrics['kategorik'] = rock_metrics(grid)
+                if agreement is not None:
+                    st.session_state.metrics['kategorik']['ari_vs_penuh'] = agreement['ari']
+                st.session_state.df = df
+
+                st.success(f"✅ Clustering selesai! Theta terbaik = {best_theta}, k = {best_k}, CP* = {best_cp:.4f}")
+                if 'sample_index' in grid:
+                    st.caption(f"Mode sampel: grid atas {len(grid['sample_index']):,} baris (CP* sampel = "
+                               f"{grid['CP_sampel']:.4f}); CP* di atas dihitung atas semua baris berlabel.")
+                st.subheader("📋 Preview Hasil Clustering")
+                st.dataframe(df[['ojol', 'jenis', 'cluster_kategorik']])
+
+                st.subheader("📈 Distribusi Cluster")
+                fig, ax = plt.subplots()
+                sns.countplot(x=df['cluster_kategorik'], palette='viridis', ax=ax)
+                ax.set_title("Distribusi Hasil Clustering Kategorik (ROCK)")
+                ax.set_xlabel("Cluster")
+                ax.set_ylabel("Jumlah Data")
+                st.pyplot(fig)
+
+                # 4. Visualisasi 2-D Hasil Clustering ROCK
+                st.subheader(f"🔍 Visualisasi {embed_axis} Hasil Clustering ROCK")
+
+                # Gunakan encoded dari hasil clustering terbaik (jarak Hamming)
+                X_tsne = cached_embedding(encoded.to_numpy(), best_labels, 'hamming')
+
+                # Visualisasi
+                title = f'Visualisasi ROCK Clustering\nTheta={best_theta}, k={best_k}, CP*={best_cp:.4f}'
+                if X_tsne is not None:
+                    cached_figure(
+                        'scatter', [X_tsne, best_labels], {'title': title, 'axis': embed_axis},
+                        lambda: cluster_scatter_figure(X_tsne, best_labels, title, embed_axis)
+                    )
+
+            except Exception as e:
+                st.error(f"❌ Terjadi kesalahan saat melakukan clustering ROCK: {e}")
+
+    # =============== CLUSTERING ENSEMBLE ===============
+    elif menu == "🔗 Clustering Ensemble":
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from clustering.engine import rock_grid_search
+        from clustering.pipeline import ensemble_input, rock_metrics
+        from clustering.plotting import cluster_scatter_figure
+
+        st.title("🔗 Clustering Ensemble (ROCK)")
+
+        df = st.session_state.df
+
+        if df is None or 'cluster_numerik' not in df or 'cluster_kategorik' not in df:
+            st.warning("⚠️ Pastikan data sudah diproses melalui Clustering Numerik dan Kategorik terlebih dahulu.")
+        else:
+            try:
+                st.subheader("⚙️ Proses Ensemble Clustering")
+                compress = st.checkbox(
+                    "Mode terkompresi (profil kategori unik)", value=False,
+                    help="Baris dengan kombinasi label identik digabung menjadi satu profil berbobot, "
+                         "sehingga waktu proses bergantung pada jumlah profil, bukan jumlah data. Hasilnya "
+                         "aproksimasi: theta, k, dan label bisa berbeda dari run atas semua baris."
+                )
 
-            for cl in cluster_list:
-                st.markdown(f"### 🧩 Cluster {cl}")
-                col1, col2, col3 = st.columns(3)
+                # ===============================
+                # PROSES CLUSTERING ENSEMBLE
+                # ===============================
+                sample_size = rock_sample_controls('ensemble', len(df))
+                df_ensemble_input, encoded_ensemble = ensemble_input(df)
+
+                theta_list = ENSEMBLE_THETAS
+                grid, agreement = rock_grid_stage(
+                    'ensemble', [df_ensemble_input],
+                    {'theta_list': theta_list, 'k_range': ROCK_K_RANGE, 'compress': compress, 'method': rock_method},
+                    lambda progress, size: rock_grid_search(
+                        df_ensemble_input, theta_list, ROCK_K_RANGE,
+                        cp_encoded=pd.DataFrame(encoded_ensemble), progress=progress, compress=compress,
+                        n_jobs=n_jobs, sample_size=size, method=rock_method
+                    ),
+                    "Grid ROCK ensemble", sample_size
+                )
+                if grid is None:
+                    stop_page()
+                best_cp = grid['CP']
+                best_labels = grid['labels']
+                best_theta = grid['theta']
+                best_k = grid['k']
+
+                df['cluster_ensemble_rock'] = best_labels
+                st.session_state.metrics['ensemble'] = rock_metrics(grid)
+                if agreement is not None:
+                    st.session_state.metrics['ensemble']['ari_vs_penuh'] = agreement['ari']
+                st.session_state.df = df
+
+                st.success(f"✅ Clustering ensemble selesai! Theta terbaik = {best_theta}, k = {best_k}, CP* = {best_cp:.4f}")
+                if 'sample_index' in grid:
+                    st.caption(f"Mode sampel: grid atas {len(grid['sample_index']):,} baris (CP* sampel = "
+                               f"{grid['CP_sampel']:.4f}); CP* di atas dihitung atas semua baris berlabel.")
+                st.subheader("📋 Hasil Clustering Ensemble")
+                st.dataframe(df[['cluster_numerik', 'cluster_kategorik', 'cluster_ensemble_rock']])
+
+                st.subheader("📈 Distribusi Cluster Ensemble")
+                fig, ax = plt.subplots()
+                sns.countplot(x=df['cluster_ensemble_rock'], palette='magma', ax=ax)
+                ax.set_title("Distribusi Cluster Ensemble (ROCK)")
+                ax.set_xlabel("Cluster")
+                ax.set_ylabel("Jumlah Data")
+                st.pyplot(fig)
+
+                # ===============================
+                # Visualisasi 2-D Hasil Ensemble
+                # ===============================
+                st.subheader(f"🔍 Visualisasi {embed_axis} Hasil Ensemble")
+
+                X_tsne = cached_embedding(encoded_ensemble, best_labels, 'hamming')
+
+                title = f'Visualisasi ROCK Clustering Ensemble\nTheta={best_theta}, k={best_k}, CP*={best_cp:.4f}'
+                if X_tsne is not None:
+                    cached_figure(
+                        'scatter', [X_tsne, best_labels], {'title': title, 'axis': embed_axis},
+                        lambda: cluster_scatter_figure(X_tsne, best_labels, title, embed_axis)
+                    )
+
+            except Exception as e:
+                st.error(f"❌ Terjadi kesalahan saat ensemble clustering: {e}")
+
+    # =============== EVALUASI CLUSTERING ENSEMBLE ===============
+    elif menu == "📏 Evaluasi Clustering Ensemble":
+        from clustering.pipeline import evaluate_ensemble
+
+        st.title("📏 Evaluasi Clustering Ensemble")
+
+        df = st.session_state.df
+        if df is None or 'cluster_ensemble_rock' not in df:
+            st.warning("⚠️ Pastikan Anda telah menyelesaikan proses Clustering Ensemble terlebih dahulu.")
+        else:
+            try:
+                st.subheader("📌 Davies-Bouldin Index (DBI)")
+
+                # Indeks atas jarak Hamming one-hot input ensemble, dihitung dari profil unik
+                eval_cols = ['cluster_numerik', 'cluster_kategorik', 'cluster_ensemble_rock']
+                evaluation = stage_cache.get_or_compute(
+                    'evaluasi', [df[eval_cols]], {}, lambda: evaluate_ensemble(df)
+                )
 
+                db_index = evaluation['dbi']
+                st.session_state.metrics.setdefault('ensemble', {}).update(
+                    dbi=db_index['value'], silhouette=evaluation['silhouette']['value']
+                )
+                st.success(f"✔️ Nilai Davies-Bouldin Index (DBI): **{db_index['value']:.4f}**")
+                st.markdown("""
+                **Interpretasi:**
+                - DBI yang lebih rendah menandakan cluster yang lebih baik (semakin kecil semakin baik).
+                - Nilai DBI < 1 umumnya dianggap baik dalam praktik clustering.
+                """)
+
+                st.subheader("📌 Indeks Validitas Lainnya")
+                col1, col2 = st.columns(2)
                 with col1:
-                    st.metric(label="💰 Rata-rata Omset", value=f"{mean_stats.loc[cl, 'omset']:,}")
+                    st.metric(label="Silhouette (Hamming)", value=f"{evaluation['silhouette']['value']:.4f}")
                 with col2:
-                    st.metric(label="👷 Rata-rata Tenaga Kerja", value=f"{mean_stats.loc[cl, 'tenaga kerja']:,}")
-                with col3:
-                    st.metric(label="🏢 Rata-rata Modal", value=f"{mean_stats.loc[cl, 'modal']:,}")
-
-                st.markdown("---")
-
-        except Exception as e:
-            st.error(f"❌ Terjadi kesalahan saat menampilkan interpretasi: {e}")
-
-        st.subheader("📊 Dominasi Variabel Kategorikal per Cluster")
-
-        # Distribusi Ojol per Cluster
-        st.markdown("#### 🚗 Distribusi *Ojol* per Cluster")
-        ojol_dist = pd.crosstab(df['cluster_ensemble_rock'], df['ojol'])
-        st.dataframe(ojol_dist)
-
-        st.markdown("##### ✅ Dominasi Ojol Tiap Cluster:")
-        for cl in ojol_dist.index:
-            dominant_ojol = ojol_dist.loc[cl].idxmax()
-            count = ojol_dist.loc[cl].max()
-            st.markdown(f"- Cluster {cl}: **{dominant_ojol.upper()}** sebanyak {count} UMKM")
-
-        st.markdown("---")
-
-        # Distribusi Jenis per Cluster
-        st.markdown("#### 🏷️ Distribusi *Jenis* Produk per Cluster")
-        jenis_dist = pd.crosstab(df['cluster_ensemble_rock'], df['jenis'])
-        st.dataframe(jenis_dist)
+                    st.metric(label="CP*", value=f"{evaluation['cp_star']['value']:.4f}")
+                st.markdown("""
+                - Silhouette mendekati 1 berarti anggota klaster jauh lebih dekat ke klasternya sendiri.
+                - CP* yang lebih tinggi berarti kemiripan dalam klaster lebih besar.
+                """)
+            except Exception as e:
+                st.error(f"❌ Terjadi kesalahan saat menghitung DBI: {e}")
+
+    # =============== INTERPRETASI CLUSTERING ENSEMBLE ===============
+    elif menu == "🧾 Interpretasi Hasil":
+        st.title("🧾 Interpretasi Hasil Clustering Ensemble")
+
+        df = st.session_state.df
+        if df is None or 'cluster_ensemble_rock' not in df:
+            st.warning("⚠️ Pastikan hasil clustering ensemble sudah tersedia.")
+        else:
+            try:
+                st.subheader("📈 Rata-rata Omset, Tenaga Kerja, dan Modal per Cluster")
+
+                # Hitung rata-rata per cluster
+                mean_stats = df.groupby('cluster_ensemble_rock')[['omset', 'tenaga kerja', 'modal']].mean().round(2)
+                cluster_list = mean_stats.index.tolist()
+
+                for cl in cluster_list:
+                    st.markdown(f"### 🧩 Cluster {cl}")
+                    col1, col2, col3 = st.columns(3)
+
+                    with col1:
+                        st.metric(label="💰 Rata-rata Omset", value=f"{mean_stats.loc[cl, 'omset']:,}")
+                    with col2:
+                        st.metric(label="👷 Rata-rata Tenaga Kerja", value=f"{mean_stats.loc[cl, 'tenaga kerja']:,}")
+                    with col3:
+                        st.metric(label="🏢 Rata-rata Modal", value=f"{mean_stats.loc[cl, 'modal']:,}")
+
+                    st.markdown("---")
+
+            except Exception as e:
+                st.error(f"❌ Terjadi kesalahan saat menampilkan interpretasi: {e}")
+
+            st.subheader("📊 Dominasi Variabel Kategorikal per Cluster")
+
+            # Distribusi Ojol per Cluster
+            st.markdown("#### 🚗 Distribusi *Ojol* per Cluster")
+            ojol_dist = pd.crosstab(df['cluster_ensemble_rock'], df['ojol'])
+            st.dataframe(ojol_dist)
+
+            st.markdown("##### ✅ Dominasi Ojol Tiap Cluster:")
+            for cl in ojol_dist.index:
+                dominant_ojol = ojol_dist.loc[cl].idxmax()
+                count = ojol_dist.loc[cl].max()
+                st.markdown(f"- Cluster {cl}: **{dominant_ojol.upper()}** sebanyak {count} UMKM")
+
+            st.markdown("---")
+
+            # Distribusi Jenis per Cluster
+            st.markdown("#### 🏷️ Distribusi *Jenis* Produk per Cluster")
+            jenis_dist = pd.crosstab(df['cluster_ensemble_rock'], df['jenis'])
+            st.dataframe(jenis_dist)
+
+            st.markdown("##### ✅ Dominasi Jenis Tiap Cluster:")
+            for cl in jenis_dist.index:
+                dominant_jenis = jenis_dist.loc[cl].idxmax()
+                count = jenis_dist.loc[cl].max()
+                st.markdown(f"- Cluster {cl}: **{dominant_jenis.upper()}** sebanyak {count} UMKM")
+
+    # =============== UNDUH ===============
+    elif menu == "💾 Unduh Hasil Clustering Ensemble":
+        st.title("💾 Unduh Hasil Clustering Ensemble")
+
+        df = st.session_state.df
+
+        if df is None or 'cluster_ensemble_rock' not in df:
+            st.warning("⚠️ Data belum tersedia atau clustering ensemble belum dilakukan.")
+        else:
+            st.markdown("### 🔽 Tabel Hasil Clustering Ensemble")
+            preview_table(df, key='unduh')
 
-        st.markdown("##### ✅ Dominasi Jenis Tiap Cluster:")
-        for cl in jenis_dist.index:
-            dominant_jenis = jenis_dist.loc[cl].idxmax()
-            count = jenis_dist.loc[cl].max()
-            st.markdown(f"- Cluster {cl}: **{dominant_jenis.upper()}** sebanyak {count} UMKM")
-
-# =============== UNDUH ===============
-elif menu == "💾 Unduh Hasil Clustering Ensemble":
-    st.title("💾 Unduh Hasil Clustering Ensemble")
-
-    df = st.session_state.df
-
-    if df is None or 'cluster_ensemble_rock' not in df:
-        st.warning("⚠️ Data belum tersedia atau clustering ensemble belum dilakukan.")
-    else:
-        st.markdown("### 🔽 Tabel Hasil Clustering Ensemble")
-        st.dataframe(df)
-
-        # Simpan ke CSV dalam memori
-        csv = df.to_csv(index=False).encode('utf-8')
-
-        # Tombol Unduh
-        st.download_button(
-            label="💾 Unduh sebagai CSV",
-            data=csv,
-            file_name="hasil_clustering_ensemble.csv",
-            mime='text/csv'
-        )
+            col1, col2 = st.columns(2)
+            with col1:
+                export_fmt = st.selectbox("Format file", list(EXPORT_FORMATS), format_func=lambda f: EXPORT_FORMATS[f][0])
+            with col2:
+                bundle = st.checkbox(
+                    "Bundel zip dengan parameter & metrik", value=False,
+                    help="Menambahkan parameter.json (theta, k, linkage, CP*, Pseudo-F, DBI) dan model untuk data baru."
+                )
+            metrics = st.session_state.metrics
+            df_raw = st.session_state.df_raw
+            if bundle:
+                st.json(metrics)
+
+            def build_export():
+                # Dijalankan saat tombol diklik. Ditulis per potongan ke file sementara, tetapi
+                # download_button hanya menerima bytes/BytesIO sehingga isi file tetap dibaca utuh.
+                model = None
+                if bundle and {'kategorik', 'ensemble'} <= set(metrics) and df_raw is not None:
+                    from clustering.model import ClusteringModel
+
+                    model = ClusteringModel(df_raw, df, metrics['kategorik']['theta'], metrics['ensemble']['theta'])
+                with export_file(df, export_fmt, metrics=metrics if bundle else None, model=model) as out:
+                    return out.read()
+
+            st.download_button(
+                label="💾 Unduh hasil",
+                data=build_export,
+                file_name=export_name(export_fmt, bundle),
+                mime=export_mime(export_fmt, bundle),
+                on_click='ignore'
+            )
+finally:
+    # =============== INSTRUMENTASI ===============
+    finish_run()